@@ -123,6 +123,19 @@ REST_FRAMEWORK = {
     }
 }
 
+# Cache (use a shared backend such as Redis in production so that cache
+# invalidation and recompute locks are seen by every worker)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='ecohub-cache'),
+    }
+}
+
+# Accept new reviews into a queue and answer 202 Accepted, leaving the inserts
+# to the ingest_reviews worker (useful during traffic spikes)
+REVIEW_ASYNC_INGESTION = config('REVIEW_ASYNC_INGESTION', default=False, cast=bool)
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
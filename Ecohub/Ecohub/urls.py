@@ -15,6 +15,7 @@ urlpatterns = [
     path('api/products/', include('products.urls')),
     path('api/vendors/', include('vendors.urls')),
     path('api/reviews/', include('reviews.urls')),
+    path('api/impact/', product_views.ImpactView.as_view(), name='impact-api'),
 
     # Web views - Products
     path('', product_views.home_view, name='home'),
@@ -0,0 +1,67 @@
+"""
+Conditional GET support (ETag / Last-Modified) for API viewsets.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def resource_etag(request, *parts):
+    """Weak ETag over version parts plus everything else that shapes the response."""
+    user_id = request.user.pk if request.user.is_authenticated else None
+    digest = hashlib.md5(
+        repr((parts, request.get_full_path(), user_id)).encode()
+    ).hexdigest()
+    return 'W/' + quote_etag(digest)
+
+
+class ConditionalGetMixin:
+    """
+    Answer GETs with 304 Not Modified before serializing anything.
+
+    ``retrieve`` probes only the ``conditional_fields`` timestamps of the
+    object; ``list`` probes ``Max()`` of the same fields plus ``Count()``
+    over the filtered queryset. Both set ETag and Last-Modified on full
+    responses so clients and CDNs can revalidate cheaply.
+    """
+    conditional_fields = ('updated_at',)
+
+    def _conditional(self, request, version, last_modified, respond):
+        etag = resource_etag(request, version)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = respond()
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        probe = self.filter_queryset(self.get_queryset()).prefetch_related(None).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).values_list(*self.conditional_fields).first()
+        if probe is None:
+            return super().retrieve(request, *args, **kwargs)
+        last_modified = max((value for value in probe if value is not None), default=None)
+        return self._conditional(
+            request, probe, last_modified,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
+
+    def list(self, request, *args, **kwargs):
+        probe = self.filter_queryset(self.get_queryset()).prefetch_related(None).order_by().aggregate(
+            total=Count('pk'),
+            **{f'latest_{index}': Max(field) for index, field in enumerate(self.conditional_fields)}
+        )
+        timestamps = [probe[f'latest_{index}'] for index in range(len(self.conditional_fields))]
+        last_modified = max((value for value in timestamps if value is not None), default=None)
+        return self._conditional(
+            request, (probe['total'], timestamps), last_modified,
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
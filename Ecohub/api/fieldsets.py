@@ -0,0 +1,32 @@
+"""
+Sparse fieldsets: ``?fields=`` and ``?omit=`` on read requests.
+"""
+from rest_framework.permissions import SAFE_METHODS
+
+
+def sparse_fieldset(request, available):
+    """Return the set of field names a read request asked for, or None for all of them."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    fields = request.query_params.get('fields')
+    omit = request.query_params.get('omit')
+    if not fields and not omit:
+        return None
+    selected = set(available)
+    if fields:
+        selected &= {name.strip() for name in fields.split(',')}
+    if omit:
+        selected -= {name.strip() for name in omit.split(',')}
+    return selected
+
+
+class SparseFieldsetMixin:
+    """Serializer mixin that drops fields not selected by ?fields= / ?omit=."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = sparse_fieldset(self.context.get('request'), self.fields)
+        if selected is not None:
+            for name in list(self.fields):
+                if name not in selected:
+                    self.fields.pop(name)
@@ -0,0 +1,176 @@
+"""
+Pagination classes shared by the API viewsets.
+"""
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over the queryset's own ordering.
+
+    The first ordering term, with ties broken on the primary key, becomes a
+    ``(value, pk)`` range condition. Every page is then a single indexed scan
+    with no COUNT and no OFFSET, so page N costs the same as page 1. The
+    ordering field must be a non-null concrete field of the model.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.field, self.descending = self.get_ordering(queryset)
+
+        position = self.decode_cursor(request)
+        reverse = position is not None and position['reverse']
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        if position is not None:
+            queryset = queryset.filter(self.seek(position['value'], position['pk'], descending))
+        loaded, deferring = queryset.query.deferred_loading
+        if queryset._fields is None and not deferring and self.field.name not in loaded:
+            # Cursors read the ordering field, so keep it out of any only() pruning
+            queryset = queryset.only(*loaded, self.field.name)
+        rows = list(queryset.order_by(f'{prefix}{self.field.name}', f'{prefix}pk')[:self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = position is not None, has_more
+        return self.page
+
+    def get_ordering(self, queryset):
+        model = queryset.model
+        ordering = list(queryset.query.order_by) or list(model._meta.ordering)
+        term = next((item for item in ordering if isinstance(item, str)), '-pk')
+        name = term.lstrip('-')
+        try:
+            field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return model._meta.pk, True
+        if not field.concrete or field.is_relation or field.null:
+            return model._meta.pk, True
+        return field, term.startswith('-')
+
+    def seek(self, value, pk, descending):
+        lookup = 'lt' if descending else 'gt'
+        name = self.field.name
+        if self.field.primary_key:
+            return Q(**{f'pk__{lookup}': pk})
+        return Q(**{f'{name}__{lookup}': value}) | Q(**{name: value, f'pk__{lookup}': pk})
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            return {
+                'value': self.field.to_python(position['v']),
+                'pk': self.field.model._meta.pk.to_python(position['pk']),
+                'reverse': bool(position.get('r')),
+            }
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        if isinstance(instance, dict):
+            # values() rows, e.g. from the fast product listing
+            value = instance[self.field.attname]
+            pk = instance[self.field.model._meta.pk.attname]
+        else:
+            value, pk = getattr(instance, self.field.attname), instance.pk
+        if not isinstance(value, (bool, int, float, str)):
+            value = str(value)
+        position = {'v': value, 'pk': pk}
+        if reverse:
+            position['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(position).encode()).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+def keyset_chunks(queryset, chunk_size):
+    """
+    Yield the queryset as lists of at most ``chunk_size`` rows, each fetched
+    by its own ``(ordering field, pk)`` seek query. Unlike ``iterator()``,
+    this never depends on server-side cursors, which MySQL lacks, so memory
+    stays at one chunk however large the result. Rows come in the order
+    KeysetPagination uses: ties on the ordering field are broken on the
+    primary key in the same direction.
+    """
+    keyset = KeysetPagination()
+    keyset.field, descending = keyset.get_ordering(queryset)
+    prefix = '-' if descending else ''
+    queryset = queryset.order_by(f'{prefix}{keyset.field.name}', f'{prefix}pk')
+    chunk = list(queryset[:chunk_size])
+    while chunk:
+        yield chunk
+        if len(chunk) < chunk_size:
+            break
+        last = chunk[-1]
+        chunk = list(queryset.filter(
+            keyset.seek(getattr(last, keyset.field.attname), last.pk, descending)
+        )[:chunk_size])
+
+
+class PageOrKeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination unless the client asks for keyset pagination
+    with ``?pagination=cursor`` (or follows a ``?cursor=`` link).
+    """
+    mode_query_param = 'pagination'
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if (request.query_params.get(self.mode_query_param) == 'cursor'
+                or self.keyset_class.cursor_query_param in request.query_params):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,3 +1,144 @@
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from products.models import Category, Product
+from reviews.models import Review
+from vendors.models import Vendor
+
+from .pagination import KeysetPagination
+
+User = get_user_model()
+
+
+class SmallKeysetPagination(KeysetPagination):
+    page_size = 3
+
+
+def cursor_of(link):
+    return parse_qs(urlparse(link).query)['cursor'][0] if link else None
+
+
+class KeysetPaginationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        vendor_user = User.objects.create_user('vendor', user_type='vendor')
+        cls.vendor = Vendor.objects.create(
+            user=vendor_user, company_name='Green Co', business_license='L-1', tax_id='T-1',
+            business_address='1 Green St', contact_phone='555', description='Vendor'
+        )
+        cls.category = Category.objects.create(name='Energy', description='Energy')
+        # Few distinct prices, so pages split runs of equal ordering values
+        cls.products = [
+            Product.objects.create(
+                name=f'Product {index}', description='Product', category=cls.category, vendor=cls.vendor,
+                price=[5, 10, 10, 10, 20][index % 5], energy_efficiency_rating='A',
+                carbon_footprint=1, energy_consumption=1, slug=f'product-{index}'
+            )
+            for index in range(25)
+        ]
+
+
+class KeysetPaginationTests(KeysetPaginationTestCase):
+    def paginate(self, queryset, cursor=None):
+        url = '/api/products/' + (f'?cursor={cursor}' if cursor else '')
+        paginator = SmallKeysetPagination()
+        page = paginator.paginate_queryset(queryset, Request(APIRequestFactory().get(url)))
+        return [product.pk for product in page], paginator.get_next_link(), paginator.get_previous_link()
+
+    def assertRoundTrip(self, ordering):
+        queryset = Product.objects.order_by(ordering)
+        expected = list(queryset.order_by(ordering, ('-' if ordering.startswith('-') else '') + 'pk')
+                        .values_list('pk', flat=True))
+
+        pages, cursor = [], None
+        while True:
+            ids, next_link, previous_link = self.paginate(queryset, cursor)
+            self.assertEqual(previous_link is None, cursor is None)
+            pages.append(ids)
+            if next_link is None:
+                break
+            cursor = cursor_of(next_link)
+        self.assertEqual([pk for page in pages for pk in page], expected)
+        self.assertTrue(all(len(page) == SmallKeysetPagination.page_size for page in pages[:-1]))
+
+        # Walk back from the last page through the previous links
+        backwards, cursor = [pages[-1]], cursor_of(previous_link)
+        while cursor:
+            ids, next_link, previous_link = self.paginate(queryset, cursor)
+            self.assertIsNotNone(next_link)
+            backwards.append(ids)
+            cursor = cursor_of(previous_link)
+        self.assertEqual(backwards[::-1], pages)
+
+    def test_descending_round_trip(self):
+        self.assertRoundTrip('-price')
+
+    def test_ascending_round_trip(self):
+        self.assertRoundTrip('price')
+
+    def test_invalid_cursor(self):
+        for cursor in ('garbage', 'eyJ2IjogMX0='):  # The second is valid base64 JSON without a pk
+            with self.assertRaises(NotFound):
+                self.paginate(Product.objects.order_by('price'), cursor)
+
+
+class CursorPaginationEndpointTests(KeysetPaginationTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for index, product in enumerate(cls.products):
+            Review.objects.create(
+                product=product, user=User.objects.create_user(f'reviewer{index}'), is_approved=True,
+                overall_rating=index % 5 + 1, eco_impact_rating=3, value_for_money=3, build_quality=3,
+                title='Review', comment='Review'
+            )
+        for index in range(24):
+            Vendor.objects.create(
+                user=User.objects.create_user(f'vendor{index}', user_type='vendor'),
+                company_name=f'Vendor {index}', business_license='L', tax_id='T',
+                business_address='Street', contact_phone='555', description='Vendor'
+            )
+
+    def setUp(self):
+        cache.clear()  # Throttle counters and cached listings
+        self.client = APIClient()
+
+    def walk(self, url):
+        ids, link = [], url
+        while link:
+            response = self.client.get(link)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertNotIn('count', data)
+            ids.extend(item['id'] for item in data['results'])
+            link = data['next']
+        return ids
+
+    def test_cursor_mode_on_list_endpoints(self):
+        for url, model in (
+            ('/api/products/?pagination=cursor', Product),
+            ('/api/reviews/api/?pagination=cursor', Review),
+            ('/api/vendors/api/?pagination=cursor', Vendor),
+        ):
+            with self.subTest(url=url):
+                ids = self.walk(url)
+                self.assertEqual(len(ids), len(set(ids)))
+                self.assertEqual(set(ids), set(model.objects.values_list('pk', flat=True)))
+
+    def test_cursor_mode_follows_the_requested_ordering(self):
+        ids = self.walk('/api/reviews/api/?pagination=cursor&order_by=-overall_rating')
+        self.assertEqual(ids, list(
+            Review.objects.order_by('-overall_rating', '-pk').values_list('pk', flat=True)
+        ))
+
+    def test_page_number_mode_is_the_default(self):
+        self.assertIn('count', self.client.get('/api/products/').json())
 
-# Create your tests here.
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/products/?cursor=garbage').status_code, 404)
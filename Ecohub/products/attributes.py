@@ -0,0 +1,180 @@
+"""
+Typed attribute index over Product.specifications.
+
+Every scalar entry of a product's specifications becomes one
+ProductAttribute row; nested objects are flattened into dotted keys.
+Filters such as ``spec.capacity__gte=10`` turn into semijoins on the
+(key, number_value) index, and per-category attribute facets are one
+grouped query over the side table.
+"""
+import re
+
+from django.db import transaction
+from django.db.models import Count, Max, Min
+
+from . import cache as catalog_cache
+from .models import Product, ProductAttribute
+
+SPEC_PARAM_PREFIX = 'spec.'
+SPEC_LOOKUPS = ('eq', 'gt', 'gte', 'lt', 'lte')
+MAX_KEY_LENGTH = 64
+MAX_TEXT_LENGTH = 200
+MAX_FACET_VALUES = 20
+NUMBER_RE = re.compile(r'^\s*(-?\d+(?:\.\d+)?)')
+PLAIN_NUMBER_RE = re.compile(r'\s*-?\d+(?:\.\d+)?\s*')
+
+
+def normalize_key(key):
+    return re.sub(r'\s+', '_', str(key).strip().lower())
+
+
+def parse_number(value):
+    """The leading number of a spec value ("400W" -> 400.0), or None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = NUMBER_RE.match(value)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def _flatten(specifications, prefix=''):
+    for key, value in specifications.items():
+        key = prefix + normalize_key(key)
+        if isinstance(value, dict):
+            yield from _flatten(value, f'{key}.')
+        elif value is not None and not isinstance(value, list):
+            yield key, value
+
+
+def attribute_rows(product):
+    if not isinstance(product.specifications, dict):
+        return []
+    rows = {}
+    for key, value in _flatten(product.specifications):
+        if not key or len(key) > MAX_KEY_LENGTH:
+            continue
+        text = str(value).lower() if isinstance(value, bool) else str(value).strip()
+        rows[key] = ProductAttribute(
+            product_id=product.pk,
+            category_id=product.category_id,
+            key=key,
+            number_value=parse_number(value),
+            text_value=text[:MAX_TEXT_LENGTH],
+        )
+    return list(rows.values())
+
+
+def index_attributes(products):
+    """Replace the attribute rows of the given (saved) products."""
+    products = list(products)
+    rows = [row for product in products for row in attribute_rows(product)]
+    with transaction.atomic():
+        ProductAttribute.objects.filter(product_id__in=[product.pk for product in products]).delete()
+        ProductAttribute.objects.bulk_create(rows, batch_size=1000)
+
+
+def rebuild_attribute_index(batch_size=500):
+    """Rebuild the whole attribute index. Returns the number of rows written."""
+    written = 0
+    with transaction.atomic():
+        ProductAttribute.objects.all().delete()
+        batch = []
+        for product in Product.objects.only('id', 'category_id', 'specifications').iterator(chunk_size=batch_size):
+            batch.extend(attribute_rows(product))
+            if len(batch) >= batch_size:
+                ProductAttribute.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        ProductAttribute.objects.bulk_create(batch)
+        written += len(batch)
+    catalog_cache.invalidate(catalog_cache.FACETS)
+    return written
+
+
+def parse_spec_params(params):
+    """
+    Read ``spec.<key>[__<lookup>]=<value>`` query parameters.
+
+    Returns ``(conditions, errors)``: conditions are ``(key, lookup, value)``
+    with a float value for range lookups; errors map parameter to message.
+    """
+    conditions, errors = [], {}
+    for param, value in params.items():
+        if not param.startswith(SPEC_PARAM_PREFIX):
+            continue
+        name, separator, lookup = param[len(SPEC_PARAM_PREFIX):].rpartition('__')
+        if not separator:
+            name, lookup = lookup, 'eq'
+        if lookup not in SPEC_LOOKUPS:
+            errors[param] = f"Unknown lookup '{lookup}'; use one of {', '.join(SPEC_LOOKUPS)}."
+            continue
+        number = parse_number(value)
+        if lookup != 'eq' and number is None:
+            errors[param] = "A valid number is required."
+            continue
+        conditions.append((normalize_key(name), lookup, number if lookup != 'eq' else value))
+    return conditions, errors
+
+
+def filter_by_attributes(queryset, conditions):
+    """Restrict a product queryset to products matching every spec condition."""
+    for key, lookup, value in conditions:
+        attributes = ProductAttribute.objects.filter(key=key)
+        if lookup != 'eq':
+            attributes = attributes.filter(**{f'number_value__{lookup}': value})
+        elif PLAIN_NUMBER_RE.fullmatch(value):
+            attributes = attributes.filter(number_value=float(value))
+        else:
+            attributes = attributes.filter(text_value__iexact=value.strip())
+        queryset = queryset.filter(pk__in=attributes.values('product_id'))
+    return queryset
+
+
+def _build_attribute_facets(category_ids):
+    attributes = ProductAttribute.objects.filter(
+        category_id__in=category_ids, product__is_active=True
+    ).order_by()
+    numeric = {
+        row['key']: row
+        for row in attributes.filter(number_value__isnull=False).values('key').annotate(
+            count=Count('id'), min=Min('number_value'), max=Max('number_value')
+        )
+    }
+    values = {}
+    for row in attributes.filter(number_value__isnull=True).values('key', 'text_value').annotate(count=Count('id')):
+        values.setdefault(row['key'], []).append({'value': row['text_value'], 'count': row['count']})
+
+    facets = []
+    for key in sorted(set(numeric) | set(values)):
+        options = sorted(values.get(key, []), key=lambda option: (-option['count'], option['value']))
+        facet = {
+            'key': key,
+            'count': sum(option['count'] for option in options) + (numeric[key]['count'] if key in numeric else 0),
+            'values': options[:MAX_FACET_VALUES],
+        }
+        if key in numeric:
+            facet['min'], facet['max'] = numeric[key]['min'], numeric[key]['max']
+        facets.append(facet)
+    return facets
+
+
+def attribute_facets(category, include_descendants=False):
+    """
+    Attribute facets over the active products of a category.
+
+    Each facet has ``key``, ``count`` (products having the key) and the most
+    common text ``values``; keys with numeric values also carry ``min`` and
+    ``max`` for range sliders.
+    """
+    if include_descendants:
+        category_ids = sorted(category.get_descendants().values_list('id', flat=True))
+    else:
+        category_ids = [category.pk]
+    return catalog_cache.cached(
+        catalog_cache.FACETS, f'attributes:{category_ids}',
+        lambda: _build_attribute_facets(category_ids)
+    )
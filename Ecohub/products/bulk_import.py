@@ -0,0 +1,247 @@
+"""
+Bulk product import from CSV or JSON Lines.
+
+Rows are read lazily from the input stream and handled in fixed-size
+batches, so memory is bounded by the batch size rather than the file size.
+Each batch is validated by one ProductImportSerializer, gets its unique
+slugs from a single query and is written with ``bulk_create`` (products,
+then their images) in one transaction. ``bulk_create`` fires no signals,
+so the batch is search- and attribute-indexed here and caches are
+invalidated once at the end of the import.
+"""
+import codecs
+import csv
+import json
+import logging
+import operator
+from functools import reduce
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+from rest_framework.exceptions import ValidationError
+
+from . import cache as catalog_cache
+from .attributes import index_attributes
+from .models import Category, Product, ProductImage
+from .search import index_new_products
+from .serializers import ProductImportSerializer
+
+FORMATS = ('csv', 'jsonl')
+DEFAULT_BATCH_SIZE = 500
+CSV_LIST_SEPARATOR = '|'
+SLUG_BASE_LENGTH = 240  # Leaves room for a -N suffix within the 250 character column
+SLUG_RETRIES = 2
+
+logger = logging.getLogger(__name__)
+
+
+def detect_format(requested=None, name='', content_type=''):
+    """Pick the input format from an explicit choice, a file name or a content type."""
+    if requested:
+        return requested if requested in FORMATS else None
+    name, content_type = name.lower(), content_type.lower()
+    if name.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'jsonl'
+    return None
+
+
+def normalize_csv_row(row):
+    """Drop empty cells so model defaults apply, and decode the structured columns."""
+    data = {}
+    for key, value in row.items():
+        if key is None or value is None or value == '':
+            continue
+        key = key.strip()
+        if key == 'specifications':
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass  # Rejected by ProductImportSerializer.validate_specifications
+        elif key == 'image_urls':
+            value = [url.strip() for url in value.split(CSV_LIST_SEPARATOR) if url.strip()]
+        data[key] = value
+    return data
+
+
+def _decode_error(exc):
+    return {'non_field_errors': [f'Unreadable input: {exc}']}
+
+
+def read_rows(stream, file_format):
+    """
+    Yield ``(row_number, data, errors)`` for every row of a binary stream.
+
+    ``errors`` is set when a row could not even be decoded; unreadable
+    input (bad encoding, broken CSV quoting) ends the stream after one
+    such entry.
+    """
+    lines = codecs.iterdecode(iter(stream.readline, b''), 'utf-8-sig')
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        number = 0
+        while True:
+            number += 1
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except (csv.Error, UnicodeDecodeError) as exc:
+                yield number, None, _decode_error(exc)
+                return
+            yield number, normalize_csv_row(row), None
+
+    number = 0
+    while True:
+        try:
+            line = next(lines)
+        except StopIteration:
+            return
+        except UnicodeDecodeError as exc:
+            yield number + 1, None, _decode_error(exc)
+            return
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield number, None, {'non_field_errors': [f'Invalid JSON: {exc}']}
+            continue
+        if not isinstance(data, dict):
+            yield number, None, {'non_field_errors': ['Each line must be a JSON object.']}
+            continue
+        yield number, data, None
+
+
+def allocate_slugs(names):
+    """Unique slugs for a batch of product names, checked with one query."""
+    bases = [slugify(name)[:SLUG_BASE_LENGTH].strip('-') or 'product' for name in names]
+    if not bases:
+        return []
+    condition = reduce(operator.or_, (
+        Q(slug=base) | Q(slug__startswith=f'{base}-') for base in set(bases)
+    ))
+    taken = set(Product.objects.filter(condition).values_list('slug', flat=True))
+    next_suffix = {}
+    slugs = []
+    for base in bases:
+        slug, suffix = base, next_suffix.get(base, 2)
+        if base in next_suffix or slug in taken:
+            slug = f'{base}-{suffix}'
+            while slug in taken:
+                suffix += 1
+                slug = f'{base}-{suffix}'
+            next_suffix[base] = suffix + 1
+        else:
+            next_suffix[base] = suffix
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def _category_ids(batch):
+    ids = set()
+    for _, data, _ in batch:
+        try:
+            ids.add(int(data['category']))
+        except (KeyError, TypeError, ValueError):
+            pass
+    return ids
+
+
+def _create_products(rows, vendor):
+    """Insert validated rows with their images; returns the saved products."""
+    slugs = allocate_slugs([data['name'] for data in rows])
+    products, image_urls = [], []
+    for data, slug in zip(rows, slugs):
+        data = dict(data)
+        image_urls.append(data.pop('image_urls', []))
+        products.append(Product(vendor=vendor, slug=slug, **data))
+
+    with transaction.atomic():
+        Product.objects.bulk_create(products)
+        if any(product.pk is None for product in products):
+            # Backends without RETURNING (MySQL) leave pks unset; slugs identify the rows
+            ids = dict(Product.objects.filter(slug__in=slugs).values_list('slug', 'id'))
+            for product in products:
+                product.pk = ids[product.slug]
+        ProductImage.objects.bulk_create([
+            ProductImage(product=product, image_url=url, alt_text=product.name[:200], is_primary=index == 0)
+            for product, urls in zip(products, image_urls)
+            for index, url in enumerate(urls)
+        ])
+        index_new_products(products)
+        index_attributes(products)
+    return products
+
+
+def import_batch(batch, vendor):
+    """
+    Validate and insert one batch of ``read_rows`` entries.
+
+    Returns ``(created_products, failures)`` where each failure is a
+    ``{'row': number, 'errors': {...}}`` report entry.
+    """
+    serializer = ProductImportSerializer(context={
+        'categories': Category.objects.in_bulk(_category_ids(batch)),
+    })
+    valid, failures = [], []
+    for number, data, errors in batch:
+        if errors is None:
+            try:
+                valid.append(serializer.run_validation(data))
+                continue
+            except ValidationError as exc:
+                errors = exc.detail
+        failures.append({'row': number, 'errors': errors})
+    if not valid:
+        return [], failures
+
+    for attempt in range(SLUG_RETRIES):
+        try:
+            return _create_products(valid, vendor), failures
+        except IntegrityError:
+            # Another writer took one of the allocated slugs; allocate again
+            if attempt == SLUG_RETRIES - 1:
+                raise
+
+
+def import_products(stream, file_format, vendor, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Import every row of ``stream`` for ``vendor``.
+
+    Yields a report entry for each rejected row as soon as its batch is
+    processed, then a final ``{'created', 'failed', 'rows'}`` summary. If the
+    import cannot go on (a database error, say), the last
+    entry is ``{'error', 'created'}`` instead: earlier batches stay committed
+    and the batch being written is rolled back.
+    """
+    rows = read_rows(stream, file_format)
+    created = failed = 0
+    showcased = False
+    try:
+        while True:
+            try:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                products, failures = import_batch(batch, vendor)
+            except Exception:
+                # The response is already streaming; report the failure in-band
+                logger.exception('Product import for vendor %s stopped after %s rows', vendor.pk, created + failed)
+                yield {'error': 'Import stopped by an unexpected error', 'created': created}
+                return
+            created += len(products)
+            failed += len(failures)
+            showcased = showcased or any(p.is_featured and p.is_active for p in products)
+            yield from failures
+    finally:
+        if created:
+            catalog_cache.invalidate(catalog_cache.CATEGORIES, catalog_cache.FACETS)
+            if showcased:
+                catalog_cache.invalidate(catalog_cache.FEATURED, catalog_cache.HOME)
+    yield {'created': created, 'failed': failed, 'rows': created + failed}
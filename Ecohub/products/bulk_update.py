@@ -0,0 +1,111 @@
+"""
+Batched price and stock updates for a vendor's products.
+
+All rows of a request are checked for ownership with one query, then
+applied with ``bulk_update`` in transactional chunks. Rows that cannot be
+applied are reported individually instead of failing the whole batch.
+``bulk_update`` fires no signals, so search postings, ETags and caches are
+refreshed here, once per batch.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from . import cache as catalog_cache
+from .models import Product
+from .search import refresh_posting_prices
+from .serializers import ProductStockUpdateSerializer
+
+MAX_ROWS = 10000
+DEFAULT_CHUNK_SIZE = 500
+UPDATE_FIELDS = ProductStockUpdateSerializer.UPDATE_FIELDS
+SNAPSHOT_FIELDS = ('id', 'slug', 'vendor_id', 'is_featured', 'is_active', *UPDATE_FIELDS)
+
+
+def _conflict(number, row, error, detail):
+    entry = {'row': number, 'error': error, 'detail': detail}
+    if isinstance(row, dict):
+        for key in ('id', 'slug'):
+            if key in row:
+                entry[key] = row[key]
+    return entry
+
+
+def update_products(rows, vendor, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Apply ``{id|slug, price, discounted_price, availability}`` rows for ``vendor``.
+
+    Returns ``{'updated', 'unchanged', 'conflicts'}``; each conflict names
+    its 1-based row number and one of ``invalid``, ``not_found``,
+    ``forbidden`` or ``duplicate``.
+    """
+    serializer = ProductStockUpdateSerializer()
+    conflicts, valid = [], []
+    for number, row in enumerate(rows, 1):
+        try:
+            valid.append((number, serializer.run_validation(row)))
+        except ValidationError as exc:
+            conflicts.append(_conflict(number, row, 'invalid', exc.detail))
+
+    ids = {data['id'] for _, data in valid if 'id' in data}
+    slugs = {data['slug'] for _, data in valid if 'slug' in data}
+    current = {}
+    if ids or slugs:
+        for product in Product.objects.filter(Q(pk__in=ids) | Q(slug__in=slugs)).values(*SNAPSHOT_FIELDS):
+            current[product['id']] = current[product['slug']] = product
+
+    seen = set()
+    changes = []
+    unchanged = 0
+    for number, data in valid:
+        product = current.get(data.get('id', data.get('slug')))
+        if product is None:
+            conflicts.append(_conflict(number, data, 'not_found', "No such product."))
+            continue
+        if product['vendor_id'] != vendor.pk:
+            conflicts.append(_conflict(number, data, 'forbidden', "Product belongs to another vendor."))
+            continue
+        if product['id'] in seen:
+            conflicts.append(_conflict(number, data, 'duplicate', "Product already updated by an earlier row."))
+            continue
+        seen.add(product['id'])
+
+        updates = {field: data[field] for field in UPDATE_FIELDS if field in data}
+        merged = {**product, **updates}
+        repricing = 'price' in updates or 'discounted_price' in updates
+        if repricing and merged['discounted_price'] is not None and merged['discounted_price'] >= merged['price']:
+            conflicts.append(_conflict(
+                number, data, 'invalid', {'discounted_price': ["Must be lower than price."]}
+            ))
+            continue
+        updates = {field: value for field, value in updates.items() if product[field] != value}
+        if not updates:
+            unchanged += 1
+            continue
+        changes.append((product, updates))
+
+    now = timezone.now()
+    for start in range(0, len(changes), chunk_size):
+        chunk = changes[start:start + chunk_size]
+        # Rows touching the same fields share a bulk_update, so untouched columns are never written
+        groups = defaultdict(list)
+        for product, updates in chunk:
+            groups[tuple(sorted(updates))].append(
+                Product(pk=product['id'], updated_at=now, **updates)
+            )
+        with transaction.atomic():
+            for fields, objects in groups.items():
+                Product.objects.bulk_update(objects, [*fields, 'updated_at'])
+            repriced = [product['id'] for product, updates in chunk if 'price' in updates]
+            if repriced:
+                refresh_posting_prices(repriced)
+
+    if changes:
+        catalog_cache.invalidate(catalog_cache.FACETS)
+        if any(product['is_featured'] and product['is_active'] for product, _ in changes):
+            catalog_cache.invalidate(catalog_cache.FEATURED, catalog_cache.HOME)
+    conflicts.sort(key=lambda conflict: conflict['row'])
+    return {'updated': len(changes), 'unchanged': unchanged, 'conflicts': conflicts}
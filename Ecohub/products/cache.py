@@ -0,0 +1,81 @@
+"""
+Versioned response cache for catalog data that changes only on writes.
+
+Every cached value lives under a namespace whose version number is part of
+the key. Model signals bump the affected namespaces' versions, which
+orphans all of their old entries at once without scanning or deleting
+keys. After an invalidation a single worker recomputes each value while
+the others serve the previous (stale) copy, or wait briefly for the new one
+if there is none.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+
+FEATURED = 'featured'
+HOME = 'home'
+CATEGORIES = 'categories'
+FACETS = 'facets'
+IMPACT = 'impact'  # Keyed by input digest, never invalidated
+REVIEW_STATS = 'review-stats'  # Suffixed with the product id: one namespace per product
+
+CACHE_TIMEOUT = 60 * 60
+STALE_TIMEOUT = 24 * 60 * 60
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 2.0
+LOCK_POLL_INTERVAL = 0.05
+
+
+def _version_key(namespace):
+    return f'catalog-cache:{namespace}:version'
+
+
+def get_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        # Start from a clock value so an evicted counter never reuses old keys
+        cache.add(_version_key(namespace), time.time_ns(), None)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def invalidate(*namespaces):
+    for namespace in namespaces:
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            cache.set(_version_key(namespace), time.time_ns(), None)
+
+
+def cached(namespace, key, compute, timeout=CACHE_TIMEOUT):
+    """Return the cached value for ``key`` in ``namespace``, computing it at most once."""
+    digest = hashlib.md5(str(key).encode()).hexdigest()
+    value_key = f'catalog-cache:{namespace}:{get_version(namespace)}:{digest}'
+    stale_key = f'catalog-cache:{namespace}:stale:{digest}'
+
+    value = cache.get(value_key)
+    if value is not None:
+        return value
+
+    lock_key = f'{value_key}:lock'
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            value = compute()
+            cache.set(value_key, value, timeout)
+            cache.set(stale_key, value, STALE_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    # Someone else is recomputing: serve the previous value if we have one
+    value = cache.get(stale_key)
+    if value is not None:
+        return value
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(value_key)
+        if value is not None:
+            return value
+    return compute()
@@ -0,0 +1,112 @@
+"""
+Closure table maintenance and tree building for Category.parent.
+
+CategoryClosure stores every (ancestor, descendant) pair, so "this category
+and everything below it" is a single indexed lookup instead of a recursive
+walk over ``parent``.
+"""
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Category, CategoryClosure, Product
+
+
+def insert_category(category):
+    """Add closure rows for a newly created (leaf) category."""
+    links = [CategoryClosure(ancestor_id=category.pk, descendant_id=category.pk, depth=0)]
+    if category.parent_id:
+        links += [
+            CategoryClosure(ancestor_id=ancestor_id, descendant_id=category.pk, depth=depth + 1)
+            for ancestor_id, depth in CategoryClosure.objects.filter(
+                descendant_id=category.parent_id
+            ).values_list('ancestor_id', 'depth')
+        ]
+    CategoryClosure.objects.bulk_create(links)
+
+
+def move_category(category):
+    """Re-link a category's whole subtree under its current parent."""
+    with transaction.atomic():
+        subtree = list(CategoryClosure.objects.filter(
+            ancestor_id=category.pk
+        ).values_list('descendant_id', 'depth'))
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+
+        CategoryClosure.objects.filter(
+            descendant_id__in=subtree_ids
+        ).exclude(ancestor_id__in=subtree_ids).delete()
+
+        if category.parent_id:
+            ancestors = CategoryClosure.objects.filter(
+                descendant_id=category.parent_id
+            ).values_list('ancestor_id', 'depth')
+            CategoryClosure.objects.bulk_create([
+                CategoryClosure(
+                    ancestor_id=ancestor_id,
+                    descendant_id=descendant_id,
+                    depth=ancestor_depth + descendant_depth + 1
+                )
+                for ancestor_id, ancestor_depth in ancestors
+                for descendant_id, descendant_depth in subtree
+            ])
+
+
+def rebuild_closure():
+    """Recompute the whole closure table from Category.parent."""
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    links = []
+    for category_id in parents:
+        node, depth = category_id, 0
+        while node is not None and depth <= len(parents):
+            links.append(CategoryClosure(ancestor_id=node, descendant_id=category_id, depth=depth))
+            node, depth = parents.get(node), depth + 1
+    with transaction.atomic():
+        CategoryClosure.objects.all().delete()
+        CategoryClosure.objects.bulk_create(links, batch_size=1000)
+    return len(links)
+
+
+def build_category_tree():
+    """
+    Return the nested category tree with active product counts.
+
+    ``product_count`` counts the category's own active products and
+    ``total_product_count`` rolls them up over all descendants. Runs two
+    queries regardless of tree size.
+    """
+    counts = dict(
+        Product.objects.filter(is_active=True).order_by()
+        .values_list('category_id').annotate(count=Count('id'))
+    )
+    nodes = {
+        row['id']: {
+            **row,
+            'product_count': counts.get(row['id'], 0),
+            'total_product_count': 0,
+            'children': [],
+        }
+        for row in Category.objects.order_by('id').values(
+            'id', 'name', 'description', 'parent', 'icon'
+        )
+    }
+
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node['parent'])
+        if parent is None:
+            roots.append(node)
+        else:
+            parent['children'].append(node)
+
+    # Post-order walk so every child is totalled before its parent
+    stack = [(root, False) for root in reversed(roots)]
+    while stack:
+        node, children_done = stack.pop()
+        if children_done:
+            node['total_product_count'] = node['product_count'] + sum(
+                child['total_product_count'] for child in node['children']
+            )
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node['children']))
+    return roots
@@ -0,0 +1,166 @@
+"""
+Faceted counts for the catalog sidebar and the search API.
+
+All facet counts for a filter state come from one grouped query over
+(category, certification, energy rating, price band, in-price-range)
+combinations. Each facet is then summed in memory with every filter applied
+except its own, so a shopper can see how many products each alternative
+value would give. Results are cached per normalized filter signature in
+the FACETS namespace of products.cache.
+"""
+import json
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import BooleanField, Case, CharField, Count, Q, Value, When
+
+from . import cache
+from .models import Category, Product
+from .search import filter_products, tokenize
+
+ENERGY_RATING_ORDER = Product.ENERGY_RATINGS
+PRICE_BANDS = [
+    # (value, label, min, max) with inclusive bounds on two-decimal prices
+    ('under-100', 'Under $100', None, Decimal('99.99')),
+    ('100-500', '$100 to $500', Decimal('100'), Decimal('499.99')),
+    ('500-1000', '$500 to $1,000', Decimal('500'), Decimal('999.99')),
+    ('1000-plus', '$1,000 and up', Decimal('1000'), None),
+]
+
+
+def _decimal_or_none(value):
+    try:
+        return Decimal(str(value)).normalize() if value not in (None, '') else None
+    except InvalidOperation:
+        return None
+
+
+def normalize_facet_filters(search='', category=(), certification=(), energy_efficiency=(),
+                            price_min=None, price_max=None):
+    """Canonical form of a filter state, used both for filtering and as the cache signature."""
+    return {
+        'search': ' '.join(tokenize(search)),
+        'category': sorted({int(value) for value in category if str(value).isdigit()}),
+        'certification': sorted({value for value in certification if value}),
+        'energy_efficiency': sorted({value for value in energy_efficiency if value}),
+        'price_min': _decimal_or_none(price_min),
+        'price_max': _decimal_or_none(price_max),
+    }
+
+
+def _facet_rows(filters):
+    products = Product.objects.filter(is_active=True)
+    if filters['search']:
+        products = filter_products(products, filters['search'])
+
+    price_band = Case(
+        *[When(price__lte=maximum, then=Value(value))
+          for value, _, _, maximum in PRICE_BANDS if maximum is not None],
+        default=Value(PRICE_BANDS[-1][0]),
+        output_field=CharField(),
+    )
+    price_range = Q()
+    if filters['price_min'] is not None:
+        price_range &= Q(price__gte=filters['price_min'])
+    if filters['price_max'] is not None:
+        price_range &= Q(price__lte=filters['price_max'])
+    in_price_range = (
+        Case(When(price_range, then=Value(True)), default=Value(False), output_field=BooleanField())
+        if price_range else Value(True, output_field=BooleanField())
+    )
+
+    return list(products.order_by().annotate(
+        price_band=price_band, in_price_range=in_price_range
+    ).values(
+        'category_id', 'certifications', 'energy_efficiency_rating', 'price_band', 'in_price_range'
+    ).annotate(count=Count('id')))
+
+
+def _count_facets(rows, filters):
+    selected = {
+        'category_id': set(filters['category']),
+        'certifications': set(filters['certification']),
+        'energy_efficiency_rating': set(filters['energy_efficiency']),
+    }
+    counts = {field: Counter() for field in [*selected, 'price_band']}
+
+    for row in rows:
+        misses = [field for field, values in selected.items() if values and row[field] not in values]
+        if not row['in_price_range']:
+            misses.append('price_band')
+        if len(misses) > 1:
+            continue
+        # A row counts towards its own facet when every *other* filter matches
+        for field in counts:
+            if not misses or misses == [field]:
+                counts[field][row[field]] += row['count']
+    return counts
+
+
+def compute_facets(**filter_state):
+    """
+    Return facet option lists for the given filter state.
+
+    Accepts the keyword arguments of ``normalize_facet_filters``. Each option
+    is a dict with ``value``, ``label``, ``count`` and ``selected``; price
+    bands also carry ``min`` and ``max``.
+    """
+    filters = normalize_facet_filters(**filter_state)
+    signature = json.dumps(filters, sort_keys=True, default=str)
+    return cache.cached(cache.FACETS, signature, lambda: _build_facets(filters))
+
+
+def _build_facets(filters):
+    counts = _count_facets(_facet_rows(filters), filters)
+
+    categories = [
+        {
+            'value': category_id,
+            'label': name,
+            'count': counts['category_id'][category_id],
+            'selected': category_id in filters['category'],
+        }
+        for category_id, name in Category.objects.order_by('name').values_list('id', 'name')
+    ]
+    certifications = [
+        {
+            'value': value,
+            'label': label,
+            'count': counts['certifications'][value],
+            'selected': value in filters['certification'],
+        }
+        for value, label in Product.CERTIFICATION_CHOICES
+    ]
+    ratings = [
+        rating for rating in ENERGY_RATING_ORDER
+        if counts['energy_efficiency_rating'][rating] or rating in filters['energy_efficiency']
+    ] + sorted(
+        rating for rating in counts['energy_efficiency_rating']
+        if rating not in ENERGY_RATING_ORDER
+    )
+    energy_efficiency = [
+        {
+            'value': rating,
+            'label': rating,
+            'count': counts['energy_efficiency_rating'][rating],
+            'selected': rating in filters['energy_efficiency'],
+        }
+        for rating in ratings
+    ]
+    price = [
+        {
+            'value': value,
+            'label': label,
+            'min': minimum,
+            'max': maximum,
+            'count': counts['price_band'][value],
+            'selected': (minimum, maximum) == (filters['price_min'], filters['price_max']),
+        }
+        for value, label, minimum, maximum in PRICE_BANDS
+    ]
+    return {
+        'category': categories,
+        'certification': certifications,
+        'energy_efficiency': energy_efficiency,
+        'price': price,
+    }
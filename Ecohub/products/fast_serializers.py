@@ -0,0 +1,113 @@
+"""
+Read-only fast path for serializing product listings.
+
+FastProductSerializer produces exactly what ``ProductSerializer(many=True)``
+renders, but it works on ``values()`` rows and an image map built from one
+more ``values()`` query. Instead of walking every serializer field for
+every product, it compiles one converter per field up front, reusing
+ProductSerializer's own field ``to_representation`` methods so the
+formatting cannot drift.
+"""
+from collections import defaultdict
+
+from rest_framework.response import Response
+
+from .models import ProductImage
+from .serializers import ProductSerializer
+
+# Row keys that each non-column serializer field is built from
+DERIVED_FIELD_COLUMNS = {
+    'category': ['category_id'],
+    'vendor': ['vendor_id'],
+    'category_name': ['category__name'],
+    'vendor_name': ['vendor__company_name'],
+    'final_price': ['price', 'discounted_price'],
+    'average_rating': ['review_count', 'overall_rating_sum'],
+    'images': [],
+}
+IMAGE_COLUMNS = ['id', 'product_id', 'image', 'image_url', 'alt_text', 'is_primary']
+
+
+class FastProductSerializer:
+    def __init__(self, context=None):
+        self.context = context or {}
+        # One serializer instance supplies field order, sparse fieldsets and converters
+        self.fields = ProductSerializer(context=self.context).fields
+        self.image_storage = ProductImage._meta.get_field('image').storage
+
+    def columns(self, queryset):
+        columns = {'id'}
+        for name in self.fields:
+            columns.update(DERIVED_FIELD_COLUMNS.get(name, [name]))
+        # Keyset pagination reads the ordering column from each row
+        columns.update(
+            term.lstrip('-') for term in queryset.query.order_by if isinstance(term, str)
+        )
+        columns.discard('pk')
+        return sorted(columns)
+
+    def values(self, queryset):
+        """The queryset as plain rows carrying every column the fields need"""
+        queryset = queryset.prefetch_related(None).select_related(None).defer(None)
+        return queryset.values(*self.columns(queryset))
+
+    def image_map(self, product_ids):
+        request = self.context.get('request')
+        images = defaultdict(list)
+        rows = ProductImage.objects.filter(product_id__in=product_ids).order_by('id').values(*IMAGE_COLUMNS)
+        for row in rows:
+            if row['image']:
+                url = self.image_storage.url(row['image'])
+                image = request.build_absolute_uri(url) if request is not None else url
+                display_url = url
+            else:
+                image = None
+                display_url = row['image_url'] or 'https://via.placeholder.com/400x300?text=No+Image'
+            images[row['product_id']].append({
+                'id': row['id'],
+                'image': image,
+                'image_url': row['image_url'],
+                'image_url_display': display_url,
+                'alt_text': row['alt_text'],
+                'is_primary': row['is_primary'],
+            })
+        return images
+
+    def compile(self, images):
+        """One (name, converter) pair per output field, in serializer order"""
+        plan = []
+        for name, field in self.fields.items():
+            if name == 'images':
+                plan.append((name, lambda row: images.get(row['id'], [])))
+            elif name in ('category', 'vendor'):
+                plan.append((name, lambda row, key=f'{name}_id': row[key]))
+            elif name == 'final_price':
+                plan.append((name, lambda row: row['discounted_price'] if row['discounted_price'] else row['price']))
+            elif name == 'average_rating':
+                plan.append((name, lambda row, convert=field.to_representation: convert(
+                    round(row['overall_rating_sum'] / row['review_count'], 1) if row['review_count'] else 0.0
+                )))
+            else:
+                key = DERIVED_FIELD_COLUMNS.get(name, [name])[0]
+                plan.append((name, lambda row, key=key, convert=field.to_representation: (
+                    None if row[key] is None else convert(row[key])
+                )))
+        return plan
+
+    def serialize(self, rows):
+        rows = list(rows)
+        images = self.image_map([row['id'] for row in rows]) if 'images' in self.fields else {}
+        plan = self.compile(images)
+        return [{name: convert(row) for name, convert in plan} for row in rows]
+
+
+class FastProductListMixin:
+    """Serve list() through FastProductSerializer instead of ProductSerializer"""
+
+    def list(self, request, *args, **kwargs):
+        serializer = FastProductSerializer(context=self.get_serializer_context())
+        rows = serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(rows))
@@ -1,20 +1,79 @@
 import django_filters
+from rest_framework import filters
 from .models import Product
+from .attributes import filter_by_attributes, parse_spec_params
+from .search import filter_products
 
 class ProductFilter(django_filters.FilterSet):
+    """Declared filters plus ``spec.<key>__gte/lte/eq`` over the attribute index."""
     name = django_filters.CharFilter(lookup_expr='icontains')
     price_min = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
     price_max = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
-    category = django_filters.NumberFilter(field_name='category__id')
+    category = django_filters.NumberFilter(method='filter_category')
+    include_descendants = django_filters.BooleanFilter(method='filter_include_descendants')
     energy_efficiency = django_filters.CharFilter(field_name='energy_efficiency_rating')
+    energy_efficiency_min = django_filters.ChoiceFilter(
+        choices=[(rating, rating) for rating in Product.ENERGY_RATINGS],
+        method='filter_energy_efficiency_min'
+    )
     certification = django_filters.CharFilter(field_name='certifications')
     in_stock = django_filters.BooleanFilter(method='filter_in_stock')
 
     class Meta:
         model = Product
-        fields = ['name', 'price_min', 'price_max', 'category', 'energy_efficiency', 'certification']
+        fields = ['name', 'price_min', 'price_max', 'category', 'include_descendants',
+                  'energy_efficiency', 'energy_efficiency_min', 'certification']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.spec_conditions, self.spec_errors = parse_spec_params(self.data)
+
+    def is_valid(self):
+        valid = super().is_valid()
+        for param, message in self.spec_errors.items():
+            self.form.errors[param] = self.form.error_class([message])
+        return valid and not self.spec_errors
+
+    def filter_queryset(self, queryset):
+        return filter_by_attributes(super().filter_queryset(queryset), self.spec_conditions)
+
+    def filter_category(self, queryset, name, value):
+        """Match the category itself, or its whole subtree with include_descendants=true."""
+        if self.form.cleaned_data.get('include_descendants'):
+            return queryset.filter(category__ancestor_links__ancestor_id=value)
+        return queryset.filter(category__id=value)
+
+    def filter_include_descendants(self, queryset, name, value):
+        # Consumed by filter_category
+        return queryset
+
+    def filter_energy_efficiency_min(self, queryset, name, value):
+        """Products rated ``value`` or better, e.g. A matches A+++ through A."""
+        return queryset.filter(energy_efficiency_rank__lte=Product.ENERGY_RATINGS.index(value))
 
     def filter_in_stock(self, queryset, name, value):
         if value:
             return queryset.filter(availability__gt=0)
-        return queryset
\ No newline at end of file
+        return queryset
+
+class ProductSearchFilter(filters.SearchFilter):
+    """SearchFilter that answers ?search= from the product search index."""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+        return filter_products(queryset, query)
+
+class ProductOrderingFilter(filters.OrderingFilter):
+    """OrderingFilter that sorts ?ordering=energy_efficiency_rating by the numeric rank."""
+    field_aliases = {'energy_efficiency_rating': 'energy_efficiency_rank'}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [
+            ('-' if term.startswith('-') else '') + self.field_aliases.get(term.lstrip('-'), term.lstrip('-'))
+            for term in ordering
+        ]
@@ -0,0 +1,103 @@
+import json
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from products.impact import (
+    CO2_LBS_PER_KWH, DEFAULT_DRAWS, DEVICE_DEFAULTS, KG_CO2_PER_MILE, KG_CO2_PER_TREE, KG_PER_LB,
+    MAX_SIMULATION_CELLS, parse_scenarios, scenario_impact, simulate,
+)
+
+DUMMY_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+def scalar_impact(scenario):
+    """The impact calculator page's formulas, one scenario at a time."""
+    current, percent, rate = scenario['current_consumption'], scenario['energy_reduction'], scenario['electricity_rate']
+    reduction = current * (percent / 100)
+    co2_lbs = reduction * CO2_LBS_PER_KWH
+    co2_kg = co2_lbs * KG_PER_LB
+    return {
+        'current_consumption': current,
+        'annual_energy_reduction': reduction,
+        'new_annual_consumption': current - reduction,
+        'annual_cost_savings': reduction * rate,
+        'monthly_cost_savings': reduction * rate / 12,
+        'annual_co2_reduction_lbs': co2_lbs,
+        'co2_reduction_kg': co2_kg,
+        'trees_equivalent': int(co2_kg / KG_CO2_PER_TREE + 0.5),
+        'car_miles_equivalent': int(co2_kg / KG_CO2_PER_MILE + 0.5),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Measure /api/impact/ throughput on random device scenarios against a per-scenario Python loop'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--draws', type=int, default=DEFAULT_DRAWS, help='Draws per simulated scenario')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        devices = list(DEVICE_DEFAULTS)
+        scenarios = [
+            {
+                'device_type': rng.choice(devices),
+                'current_consumption': round(rng.uniform(20, 3000), 1),
+                'energy_reduction': rng.randint(0, 90),
+                'electricity_rate': round(rng.uniform(0.05, 0.40), 2),
+            }
+            for _ in range(options['scenarios'])
+        ]
+
+        results = scenario_impact(scenarios)['results']
+        for index, scenario in enumerate(scenarios):
+            expected = scalar_impact(scenario)
+            if any(abs(results[field][index] - value) > 1e-6 for field, value in expected.items()):
+                raise CommandError(f'Vectorized result differs for {scenario}')
+
+        body = json.dumps({'scenarios': scenarios})
+        host = next(
+            (host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')),
+            'localhost'
+        )
+        client = Client(HTTP_HOST=host)
+
+        def endpoint():
+            response = client.post('/api/impact/', body, content_type='application/json')
+            if response.status_code != 200:
+                raise CommandError(f'/api/impact/ answered {response.status_code}: {response.content[:200]}')
+
+        runs = (
+            ('Python loop', lambda: [scalar_impact(scenario) for scenario in scenarios]),
+            ('NumPy engine', lambda: scenario_impact(scenarios)),
+            ('POST /api/impact/', endpoint),
+        )
+        # The anonymous throttle would otherwise count every benchmark request
+        with override_settings(CACHES=DUMMY_CACHES):
+            for label, run in runs:
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    run()
+                elapsed = (time.perf_counter() - started) / options['repeat']
+                self.stdout.write(
+                    f'{label}: {elapsed * 1000:.1f} ms per {len(scenarios)} scenarios, '
+                    f'{len(scenarios) / elapsed:,.0f} scenarios/s'
+                )
+
+        # Simulation: one calculator submission, and the largest batch a request may simulate
+        inputs = parse_scenarios(scenarios)
+        for count in (1, max(1, min(len(scenarios), MAX_SIMULATION_CELLS // options['draws']))):
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                simulate(*(column[:count] for column in inputs), draws=options['draws'], seed=options['seed'])
+            elapsed = (time.perf_counter() - started) / options['repeat']
+            self.stdout.write(
+                f'Simulation: {elapsed * 1000:.1f} ms for {count} scenario(s) x {options["draws"]:,} draws'
+            )
+        self.stdout.write(self.style.SUCCESS('Vectorized results match the per-scenario formulas'))
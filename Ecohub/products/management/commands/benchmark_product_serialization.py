@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from products.fast_serializers import FastProductSerializer
+from products.models import Product
+from products.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare per-item cost of ProductSerializer and FastProductSerializer on active products'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        request = Request(RequestFactory().get('/api/products/'))
+        context = {'request': request}
+        queryset = Product.objects.filter(is_active=True).for_listing().order_by('-created_at', 'id')
+        queryset = queryset[:options['limit']]
+
+        def standard():
+            return ProductSerializer(list(queryset.all()), many=True, context=context).data
+
+        def fast():
+            serializer = FastProductSerializer(context=context)
+            return serializer.serialize(serializer.values(queryset.all()))
+
+        renderer = JSONRenderer()
+        standard_output = renderer.render(standard())
+        fast_output = renderer.render(fast())
+        if standard_output != fast_output:
+            raise CommandError('FastProductSerializer output differs from ProductSerializer')
+
+        count = len(fast())
+        if not count:
+            raise CommandError('No active products to serialize')
+        for label, serialize in (('ProductSerializer', standard), ('FastProductSerializer', fast)):
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                serialize()
+            elapsed = time.perf_counter() - started
+            per_item = elapsed / (options['repeat'] * count) * 1e6
+            self.stdout.write(f'{label}: {per_item:.1f} us/item ({count} items x {options["repeat"]})')
+        self.stdout.write(self.style.SUCCESS('Outputs are byte-identical'))
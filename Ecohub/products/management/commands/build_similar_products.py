@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.similarity import DEFAULT_NEIGHBOURS, build_similar_products
+
+
+class Command(BaseCommand):
+    help = 'Precompute the nearest neighbours shown as similar products'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--neighbours', type=int, default=DEFAULT_NEIGHBOURS)
+
+    def handle(self, *args, **options):
+        written = build_similar_products(k=options['neighbours'])
+        self.stdout.write(self.style.SUCCESS(f'Stored {written} similar product links'))
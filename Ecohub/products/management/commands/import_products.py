@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.bulk_import import DEFAULT_BATCH_SIZE, FORMATS, detect_format, import_products
+from vendors.models import Vendor
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk import products for a vendor from a CSV or JSON Lines file. Rows use '
+        'ProductSerializer field names with category as an id; image_urls is a list '
+        '(|-separated in CSV) and specifications a JSON object.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--vendor', type=int, required=True, help='Vendor id')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            vendor = Vendor.objects.get(pk=options['vendor'])
+        except Vendor.DoesNotExist:
+            raise CommandError(f"Vendor {options['vendor']} does not exist")
+        file_format = detect_format(options['format'], options['path'])
+        if file_format is None:
+            raise CommandError('Cannot tell the file format; pass --format')
+
+        with open(options['path'], 'rb') as stream:
+            for entry in import_products(stream, file_format, vendor, batch_size=options['batch_size']):
+                if 'row' in entry:
+                    self.stderr.write(json.dumps(entry))
+                elif 'error' in entry:
+                    raise CommandError(
+                        f"{entry['error']}; {entry['created']} products were created before it stopped"
+                    )
+                else:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Created {entry['created']} products, {entry['failed']} rows rejected"
+                    ))
@@ -0,0 +1,144 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from products.models import Category, Product
+
+# The list endpoints whose querysets must stay index-backed; {category} and
+# {product} are filled in with existing ids
+ENDPOINTS = [
+    '/api/products/',
+    '/api/products/?category={category}',
+    '/api/products/?category={category}&include_descendants=true',
+    '/api/products/?certification=energy_star',
+    '/api/products/?price_min=100&price_max=500',
+    '/api/products/?ordering=price',
+    '/api/products/?ordering=energy_efficiency_rating',
+    '/api/products/?energy_efficiency_min=A',
+    '/api/products/?pagination=cursor',
+    '/api/products/featured/',
+    '/api/products/categories/',
+    '/api/products/search/?q=solar',
+    '/api/reviews/api/',
+    '/api/reviews/api/?product={product}',
+    '/api/reviews/api/product/{product}/',
+    '/api/reviews/api/leaderboard/',
+    '/api/vendors/api/',
+    '/api/vendors/api/?status=verified',
+    '/',
+    '/products/',
+    '/products/?category={category}&ordering=price',
+]
+DUMMY_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+def explain_mysql(cursor, sql):
+    cursor.execute(f'EXPLAIN {sql}')
+    columns = [column[0] for column in cursor.description]
+    warnings = []
+    for row in cursor.fetchall():
+        plan = dict(zip(columns, row))
+        extra = plan.get('Extra') or ''
+        if plan.get('type') == 'ALL':
+            warnings.append(f"full scan of {plan['table']} (~{plan.get('rows')} rows)")
+        if 'Using filesort' in extra:
+            warnings.append(f"filesort on {plan['table']}")
+        if 'Using temporary' in extra:
+            warnings.append(f"temporary table for {plan['table']}")
+    return warnings
+
+
+def explain_sqlite(cursor, sql):
+    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+    warnings = []
+    for row in cursor.fetchall():
+        detail = row[-1]
+        if detail.startswith('SCAN ') and ' INDEX ' not in detail:
+            warnings.append(f'full scan: {detail}')
+        if 'TEMP B-TREE FOR ORDER BY' in detail:
+            warnings.append(f'filesort: {detail}')
+    return warnings
+
+
+def explain_postgresql(cursor, sql):
+    cursor.execute(f'EXPLAIN {sql}')
+    warnings = []
+    for (line,) in cursor.fetchall():
+        node = line.strip().lstrip('-> ').strip()
+        if node.startswith('Seq Scan on '):
+            warnings.append(f'full scan: {node}')
+        elif node.startswith('Sort '):
+            warnings.append(f'sort: {node}')
+    return warnings
+
+
+EXPLAINERS = {
+    'mysql': explain_mysql,
+    'sqlite': explain_sqlite,
+    'postgresql': explain_postgresql,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay the list endpoints, EXPLAIN every SELECT they run and flag full '
+        'scans and filesorts. Run it against production-sized data: on tiny '
+        'tables the planner rightly prefers scans.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', action='append', dest='urls', help='Extra path to check; repeatable')
+        parser.add_argument('--ignore-table', action='append', default=[],
+                            help='Do not flag plans mentioning this table; repeatable')
+        parser.add_argument('--fail', action='store_true', help='Exit with an error when anything is flagged')
+
+    def handle(self, *args, **options):
+        explain = EXPLAINERS.get(connection.vendor)
+        if explain is None:
+            raise CommandError(f'No EXPLAIN support for {connection.vendor}')
+
+        placeholders = {
+            'category': Category.objects.order_by('id').values_list('id', flat=True).first() or 0,
+            'product': Product.objects.order_by('id').values_list('id', flat=True).first() or 0,
+        }
+        urls = [url.format(**placeholders) for url in ENDPOINTS] + (options['urls'] or [])
+        host = next(
+            (host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')),
+            'localhost'
+        )
+        client = Client(HTTP_HOST=host)
+
+        flagged = 0
+        # Cached responses would hide the queries being audited
+        with override_settings(CACHES=DUMMY_CACHES):
+            for url in urls:
+                with CaptureQueriesContext(connection) as captured:
+                    response = client.get(url)
+                    if getattr(response, 'streaming', False):
+                        b''.join(response.streaming_content)
+                selects = [query['sql'] for query in captured.captured_queries
+                           if query['sql'].lstrip().upper().startswith('SELECT')]
+                self.stdout.write(f'{url} -> {response.status_code}, {len(selects)} queries')
+
+                with connection.cursor() as cursor:
+                    for sql in dict.fromkeys(selects):
+                        warnings = [
+                            warning for warning in explain(cursor, sql)
+                            if not any(table in warning for table in options['ignore_table'])
+                        ]
+                        if not warnings:
+                            continue
+                        flagged += 1
+                        for warning in warnings:
+                            self.stdout.write(self.style.WARNING(f'  {warning}'))
+                        self.stdout.write(f'    {sql[:300]}')
+
+        if flagged:
+            message = f'{flagged} queries need attention'
+            if options['fail']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('Every query is index-backed'))
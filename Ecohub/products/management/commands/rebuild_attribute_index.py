@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.attributes import rebuild_attribute_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the typed specification attribute index from every product'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        written = rebuild_attribute_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {written} product attributes'))
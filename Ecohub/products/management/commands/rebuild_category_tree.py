@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from products.category_tree import rebuild_closure
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the category closure table from Category.parent'
+
+    def handle(self, *args, **kwargs):
+        links = rebuild_closure()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt category tree with {links} closure rows'))
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:08
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+RATING_FIELDS = {
+    'overall_rating': 'overall_rating_sum',
+    'eco_impact_rating': 'eco_impact_rating_sum',
+    'value_for_money': 'value_for_money_sum',
+    'build_quality': 'build_quality_sum',
+}
+
+
+def backfill_aggregates(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Review = apps.get_model('reviews', 'Review')
+    rows = Review.objects.filter(is_approved=True).order_by().values('product_id').annotate(
+        review_count=Count('id'),
+        **{sum_field: Sum(rating_field) for rating_field, sum_field in RATING_FIELDS.items()}
+    )
+    fields = ['review_count', *RATING_FIELDS.values()]
+    Product.objects.bulk_update(
+        [Product(pk=row['product_id'], **{field: row[field] for field in fields}) for row in rows],
+        fields, batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_productimage_image_url_alter_productimage_image'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='build_quality_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='eco_impact_rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='overall_rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='value_for_money_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_search_index'),
+        ('vendors', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='energy_efficiency_rank',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(energy_efficiency_rating='A+++', then=models.Value(0)), models.When(energy_efficiency_rating='A++', then=models.Value(1)), models.When(energy_efficiency_rating='A+', then=models.Value(2)), models.When(energy_efficiency_rating='A', then=models.Value(3)), models.When(energy_efficiency_rating='B', then=models.Value(4)), models.When(energy_efficiency_rating='C', then=models.Value(5)), models.When(energy_efficiency_rating='D', then=models.Value(6)), models.When(energy_efficiency_rating='E', then=models.Value(7)), models.When(energy_efficiency_rating='F', then=models.Value(8)), models.When(energy_efficiency_rating='G', then=models.Value(9)), default=models.Value(10)), output_field=models.PositiveSmallIntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'energy_efficiency_rank'], name='product_active_energy_rank'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductAttribute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('number_value', models.FloatField(blank=True, null=True)),
+                ('text_value', models.CharField(blank=True, max_length=200)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.category')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attributes', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key', 'number_value'], name='attribute_key_number'), models.Index(fields=['key', 'text_value'], name='attribute_key_text'), models.Index(fields=['category', 'key'], name='attribute_category_key')],
+                'unique_together': {('product', 'key')},
+            },
+        ),
+    ]
@@ -1,4 +1,8 @@
+from functools import cached_property
+
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Case, Prefetch, Value, When
 from django.contrib.auth import get_user_model
 from vendors.models import Vendor
 
@@ -17,6 +21,41 @@ class Category(models.Model):
     class Meta:
         verbose_name_plural = "Categories"
 
+    def clean(self):
+        if self.pk and self.parent_id and CategoryClosure.objects.filter(
+            ancestor_id=self.pk, descendant_id=self.parent_id
+        ).exists():
+            raise ValidationError({'parent': "A category cannot be nested under itself or one of its subcategories."})
+
+    def get_descendants(self, include_self=True):
+        """All categories below this one, resolved through the closure table."""
+        links = CategoryClosure.objects.filter(ancestor=self)
+        if not include_self:
+            links = links.exclude(depth=0)
+        return Category.objects.filter(pk__in=links.values('descendant_id'))
+
+class CategoryClosure(models.Model):
+    """One row per (ancestor, descendant) pair of the category tree, including self links."""
+    ancestor = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('ancestor', 'descendant')
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+class ProductQuerySet(models.QuerySet):
+    def with_images(self):
+        """Load every product's images in one ordered prefetch query."""
+        return self.prefetch_related(
+            Prefetch('images', queryset=ProductImage.objects.order_by('id'))
+        )
+
+    def for_listing(self):
+        return self.select_related('category', 'vendor').with_images()
+
 class Product(models.Model):
     CERTIFICATION_CHOICES = [
         ('energy_star', 'Energy Star'),
@@ -25,6 +64,8 @@ class Product(models.Model):
         ('carbon_neutral', 'Carbon Neutral'),
         ('renewable', 'Renewable Energy'),
     ]
+    # Most efficient first; energy_efficiency_rank is the position in this list
+    ENERGY_RATINGS = ['A+++', 'A++', 'A+', 'A', 'B', 'C', 'D', 'E', 'F', 'G']
 
     name = models.CharField(max_length=200)
     description = models.TextField()
@@ -37,6 +78,15 @@ class Product(models.Model):
     
     # Environmental metrics
     energy_efficiency_rating = models.CharField(max_length=5)  # A++, A+, A, B, C, D, E
+    # Computed by the database so bulk_create and update() keep it in sync; unknown ratings rank last
+    energy_efficiency_rank = models.GeneratedField(
+        expression=Case(
+            *[When(energy_efficiency_rating=rating, then=Value(rank)) for rank, rating in enumerate(ENERGY_RATINGS)],
+            default=Value(len(ENERGY_RATINGS)),
+        ),
+        output_field=models.PositiveSmallIntegerField(),
+        db_persist=True,
+    )
     carbon_footprint = models.FloatField(help_text="CO2 emissions in kg/year")
     energy_consumption = models.FloatField(help_text="Energy consumption in kWh/year")
     recyclable_percentage = models.IntegerField(default=0)
@@ -54,6 +104,31 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Approved review aggregates, maintained by reviews.signals
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    overall_rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    eco_impact_rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    value_for_money_sum = models.PositiveIntegerField(default=0, editable=False)
+    build_quality_sum = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        # Every storefront query filters on is_active first
+        indexes = [
+            models.Index(fields=['is_active', 'energy_efficiency_rank'], name='product_active_energy_rank'),
+            models.Index(fields=['is_active', '-created_at'], name='product_active_newest'),
+            models.Index(fields=['is_active', 'is_featured', '-created_at'], name='product_active_featured'),
+            models.Index(fields=['is_active', 'category', '-created_at'], name='product_active_category'),
+            models.Index(fields=['is_active', 'certifications', 'price'], name='product_active_cert_price'),
+            models.Index(fields=['is_active', 'price'], name='product_active_price'),
+            # Covers the grouped facet query, which then never reads table rows
+            models.Index(
+                fields=['is_active', 'category', 'certifications', 'energy_efficiency_rating', 'price'],
+                name='product_facet_covering'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -61,6 +136,36 @@ class Product(models.Model):
     def final_price(self):
         return self.discounted_price if self.discounted_price else self.price
 
+    @cached_property
+    def primary_image(self):
+        """The image flagged is_primary, else the first one; uses prefetched images."""
+        images = list(self.images.all())
+        for image in images:
+            if image.is_primary:
+                return image
+        return images[0] if images else None
+
+    def _rating_average(self, total):
+        if not self.review_count:
+            return 0.0
+        return round(total / self.review_count, 1)
+
+    @property
+    def average_rating(self):
+        return self._rating_average(self.overall_rating_sum)
+
+    @property
+    def average_eco_impact_rating(self):
+        return self._rating_average(self.eco_impact_rating_sum)
+
+    @property
+    def average_value_for_money(self):
+        return self._rating_average(self.value_for_money_sum)
+
+    @property
+    def average_build_quality(self):
+        return self._rating_average(self.build_quality_sum)
+
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='products/', blank=True, null=True)
@@ -76,4 +181,84 @@ class ProductImage(models.Model):
         """Return image URL - either from uploaded file or direct URL"""
         if self.image:
             return self.image.url
-        return self.image_url or 'https://via.placeholder.com/400x300?text=No+Image'
\ No newline at end of file
+        return self.image_url or 'https://via.placeholder.com/400x300?text=No+Image'
+
+class ProductAttribute(models.Model):
+    """
+    One typed entry of a product's specifications.
+
+    Numeric-looking values ("400W", "21.5%", 10) also get ``number_value``,
+    so spec range filters and facets use an index instead of decoding the
+    JSON of every product. Maintained by products.attributes.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='attributes')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=64)
+    number_value = models.FloatField(null=True, blank=True)
+    text_value = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        unique_together = ('product', 'key')
+        indexes = [
+            models.Index(fields=['key', 'number_value'], name='attribute_key_number'),
+            models.Index(fields=['key', 'text_value'], name='attribute_key_text'),
+            models.Index(fields=['category', 'key'], name='attribute_category_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.key}={self.text_value}"
+
+class SimilarProduct(models.Model):
+    """A precomputed nearest neighbour of a product, written by products.similarity."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='similar_links')
+    similar = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='similar_to_links')
+    rank = models.PositiveSmallIntegerField()
+    distance = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('product', 'rank')
+        ordering = ['product', 'rank']
+
+    def __str__(self):
+        return f"{self.product_id} ~ {self.similar_id} (#{self.rank})"
+
+class SearchTerm(models.Model):
+    """Vocabulary of the product search index with per-term document frequency."""
+    term = models.CharField(max_length=64, unique=True)
+    document_frequency = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.term
+
+class SearchPosting(models.Model):
+    """
+    One (term, product) entry of the inverted index.
+
+    Filterable product attributes are copied onto each posting so that
+    category, certification and price bounds are applied while scanning the
+    posting list, without joining back to Product.
+    """
+    term = models.CharField(max_length=64)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='search_postings')
+    term_frequency = models.PositiveIntegerField()
+    document_length = models.PositiveIntegerField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    certifications = models.CharField(max_length=50, blank=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        unique_together = ('term', 'product')
+        indexes = [
+            models.Index(fields=['term', 'price'], name='search_posting_term_price'),
+            # Top postings per term for ranking, see products.search
+            models.Index(fields=['term', '-term_frequency', 'document_length'], name='search_posting_term_tf'),
+        ]
+
+class SearchIndexStats(models.Model):
+    """Single-row corpus statistics needed by BM25."""
+    document_count = models.PositiveIntegerField(default=0)
+    total_length = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Search index stats"
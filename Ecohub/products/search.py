@@ -0,0 +1,306 @@
+"""
+Inverted-index product search ranked with BM25.
+
+Active products are tokenized into SearchPosting rows (one per term and
+product) when they are saved, so a query only reads the posting lists of
+its own terms instead of scanning every product with ``icontains``. Every
+query term must match; the last one is also treated as a prefix so results
+update while the user is still typing.
+
+Ranking reads at most MAX_POSTINGS_PER_TERM postings per term, highest
+term frequency (then shortest document) first, from the
+(term, -term_frequency, document_length) index. That is where the BM25
+contributions are largest, and it keeps latency flat as posting lists grow.
+Products outside every top list are not ranked, and a prefix expands to at
+most MAX_PREFIX_EXPANSIONS terms. Either cap is reported as a truncated
+result.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+
+from .models import Product, SearchIndexStats, SearchPosting, SearchTerm
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'of', 'on', 'or', 'that', 'the', 'to', 'with',
+])
+MAX_TERM_LENGTH = 64
+NAME_WEIGHT = 2  # Name tokens count double, a cheap stand-in for BM25F field weights
+MAX_PREFIX_EXPANSIONS = 20
+MAX_POSTINGS_PER_TERM = 1000
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text):
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall((text or '').lower())
+        if token not in STOPWORDS and (len(token) > 1 or token.isdigit())
+    ]
+
+
+def document_terms(product):
+    """Term frequencies for a product's name, description and category name."""
+    counts = Counter()
+    for _ in range(NAME_WEIGHT):
+        counts.update(tokenize(product.name))
+    counts.update(tokenize(product.description))
+    counts.update(tokenize(product.category.name))
+    return counts
+
+
+def _postings_for(product, counts):
+    length = sum(counts.values())
+    return [
+        SearchPosting(
+            term=term,
+            product_id=product.pk,
+            term_frequency=frequency,
+            document_length=length,
+            category_id=product.category_id,
+            certifications=product.certifications,
+            price=product.price,
+        )
+        for term, frequency in counts.items()
+    ]
+
+
+def _adjust_document_frequency(terms, delta):
+    if not terms:
+        return
+    if delta > 0:
+        SearchTerm.objects.bulk_create(
+            [SearchTerm(term=term) for term in terms], ignore_conflicts=True
+        )
+    SearchTerm.objects.filter(term__in=terms).update(
+        document_frequency=F('document_frequency') + delta
+    )
+
+
+def _adjust_stats(documents, length):
+    if not documents and not length:
+        return
+    SearchIndexStats.objects.get_or_create(pk=1)
+    SearchIndexStats.objects.filter(pk=1).update(
+        document_count=F('document_count') + documents,
+        total_length=F('total_length') + length,
+    )
+
+
+def index_product(product):
+    """Replace a product's postings; inactive products are removed from the index."""
+    with transaction.atomic():
+        old = dict(SearchPosting.objects.filter(product_id=product.pk).values_list(
+            'term', 'document_length'
+        ))
+        SearchPosting.objects.filter(product_id=product.pk).delete()
+
+        counts = document_terms(product) if product.is_active else Counter()
+        SearchPosting.objects.bulk_create(_postings_for(product, counts))
+
+        old_terms, new_terms = set(old), set(counts)
+        _adjust_document_frequency(new_terms - old_terms, 1)
+        _adjust_document_frequency(old_terms - new_terms, -1)
+        _adjust_stats(
+            documents=bool(new_terms) - bool(old_terms),
+            length=sum(counts.values()) - next(iter(old.values()), 0),
+        )
+
+
+def index_new_products(products, batch_size=500):
+    """
+    Index products that have no postings yet, e.g. rows from bulk_create,
+    which does not fire post_save. Term frequencies and corpus stats are
+    adjusted once for the whole batch rather than once per product.
+    """
+    document_frequency = Counter()
+    documents = total_length = 0
+    postings = []
+    for product in products:
+        counts = document_terms(product) if product.is_active else Counter()
+        if not counts:
+            continue
+        documents += 1
+        total_length += sum(counts.values())
+        document_frequency.update(counts.keys())
+        postings.extend(_postings_for(product, counts))
+
+    terms_by_increment = defaultdict(list)
+    for term, increment in document_frequency.items():
+        terms_by_increment[increment].append(term)
+    with transaction.atomic():
+        SearchPosting.objects.bulk_create(postings, batch_size=batch_size)
+        for increment, terms in terms_by_increment.items():
+            _adjust_document_frequency(terms, increment)
+        _adjust_stats(documents=documents, length=total_length)
+    return documents
+
+
+def refresh_posting_prices(product_ids):
+    """Copy current product prices onto their postings after a bulk_update."""
+    SearchPosting.objects.filter(product_id__in=product_ids).update(
+        price=Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('price')[:1])
+    )
+
+
+def unindex_product(product):
+    with transaction.atomic():
+        old = dict(SearchPosting.objects.filter(product_id=product.pk).values_list(
+            'term', 'document_length'
+        ))
+        SearchPosting.objects.filter(product_id=product.pk).delete()
+        _adjust_document_frequency(set(old), -1)
+        _adjust_stats(documents=-bool(old), length=-next(iter(old.values()), 0))
+
+
+def rebuild_index(batch_size=500):
+    """Rebuild the whole index from active products. Returns the number indexed."""
+    document_frequency = Counter()
+    documents = total_length = 0
+    with transaction.atomic():
+        SearchPosting.objects.all().delete()
+        SearchTerm.objects.all().delete()
+        SearchIndexStats.objects.all().delete()
+
+        batch = []
+        products = Product.objects.filter(is_active=True).select_related('category')
+        for product in products.iterator(chunk_size=batch_size):
+            counts = document_terms(product)
+            if not counts:
+                continue
+            documents += 1
+            total_length += sum(counts.values())
+            document_frequency.update(counts.keys())
+            batch.extend(_postings_for(product, counts))
+            if len(batch) >= batch_size:
+                SearchPosting.objects.bulk_create(batch)
+                batch = []
+        SearchPosting.objects.bulk_create(batch)
+
+        SearchTerm.objects.bulk_create([
+            SearchTerm(term=term, document_frequency=frequency)
+            for term, frequency in document_frequency.items()
+        ], batch_size=batch_size)
+        SearchIndexStats.objects.create(pk=1, document_count=documents, total_length=total_length)
+    return documents
+
+
+def _resolve_terms(query):
+    """
+    Map a query to groups of indexed terms, one group per query token.
+
+    The last token's group holds the MAX_PREFIX_EXPANSIONS most frequent
+    indexed terms it prefixes. Returns (groups, document_frequencies,
+    truncated); an empty group means that token matches nothing, and
+    ``truncated`` that the prefix had more expansions.
+    """
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not tokens:
+        return [], {}, False
+    exact, prefix = tokens[:-1], tokens[-1]
+    indexed = SearchTerm.objects.filter(document_frequency__gt=0)
+    frequencies = dict(indexed.filter(term__in=exact).values_list('term', 'document_frequency'))
+    expansions = list(indexed.filter(term__startswith=prefix).order_by(
+        '-document_frequency', 'term'
+    ).values_list('term', 'document_frequency')[:MAX_PREFIX_EXPANSIONS + 1])
+    truncated = len(expansions) > MAX_PREFIX_EXPANSIONS
+    expansions = expansions[:MAX_PREFIX_EXPANSIONS]
+    frequencies.update(expansions)
+
+    groups = [[term] if term in frequencies else [] for term in exact]
+    groups.append([term for term, _ in expansions])
+    return groups, frequencies, truncated
+
+
+def _filter_postings(postings, category=None, certification=None, min_price=None, max_price=None):
+    if category:
+        postings = postings.filter(category_id=category)
+    if certification:
+        postings = postings.filter(certifications=certification)
+    if min_price:
+        postings = postings.filter(price__gte=min_price)
+    if max_price:
+        postings = postings.filter(price__lte=max_price)
+    return postings
+
+
+def search_products(query, **filters):
+    """
+    Rank products matching every query term, best BM25 score first.
+
+    Returns ``(product_ids, truncated)``. ``truncated`` is set when a term's
+    posting list or the prefix expansions went past their caps, so products
+    beyond them may be missing. Accepts the same filters as
+    ProductSearchView (category, certification, min_price, max_price); they
+    are applied on the posting lists.
+    """
+    groups, frequencies, truncated = _resolve_terms(query)
+    if not groups or not all(groups):
+        return [], False
+    stats = SearchIndexStats.objects.filter(pk=1).first()
+    if stats is None or not stats.document_count:
+        return [], False
+
+    total = stats.document_count
+    average_length = stats.total_length / total
+    idf = {
+        term: math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+        for term, frequency in frequencies.items()
+    }
+    group_of = {term: index for index, group in enumerate(groups) for term in group}
+
+    # (product_id, term) -> (term_frequency, document_length), from each term's top postings
+    postings = {}
+    for term in group_of:
+        top = list(_filter_postings(SearchPosting.objects.filter(term=term), **filters).order_by(
+            '-term_frequency', 'document_length', 'product_id'
+        ).values_list('product_id', 'term_frequency', 'document_length')[:MAX_POSTINGS_PER_TERM + 1])
+        truncated = truncated or len(top) > MAX_POSTINGS_PER_TERM
+        for product_id, frequency, length in top[:MAX_POSTINGS_PER_TERM]:
+            postings[product_id, term] = (frequency, length)
+
+    matched = defaultdict(set)
+    for product_id, term in postings:
+        matched[product_id].add(group_of[term])
+    if len(groups) > 1:
+        # A candidate may match a term outside that term's top list: look its postings up directly
+        incomplete = [product_id for product_id, hit in matched.items() if len(hit) < len(groups)]
+        if incomplete:
+            for product_id, term, frequency, length in SearchPosting.objects.filter(
+                product_id__in=incomplete, term__in=list(group_of)
+            ).values_list('product_id', 'term', 'term_frequency', 'document_length'):
+                postings[product_id, term] = (frequency, length)
+                matched[product_id].add(group_of[term])
+
+    scores = defaultdict(float)
+    for (product_id, term), (frequency, length) in postings.items():
+        saturation = frequency * (BM25_K1 + 1) / (
+            frequency + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+        )
+        scores[product_id] += idf[term] * saturation
+
+    ranked = sorted(
+        (product_id for product_id, hit in matched.items() if len(hit) == len(groups)),
+        key=lambda product_id: (-scores[product_id], product_id)
+    )
+    return ranked, truncated
+
+
+def filter_products(queryset, query):
+    """Restrict a product queryset to index matches for every query term (unranked)."""
+    groups, _, _ = _resolve_terms(query)
+    if not groups:
+        return queryset
+    for group in groups:
+        if not group:
+            return queryset.none()
+        queryset = queryset.filter(
+            pk__in=SearchPosting.objects.filter(term__in=group).values('product_id')
+        )
+    return queryset
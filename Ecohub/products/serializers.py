@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from api.fieldsets import SparseFieldsetMixin, sparse_fieldset
 from .models import Product, Category, ProductImage
+from .impact import DEFAULT_DRAWS, DEFAULT_ELECTRICITY_RATE, DEFAULT_PERCENTILES, MAX_DRAWS, MAX_SCENARIOS
 
 class ProductImageSerializer(serializers.ModelSerializer):
     image_url_display = serializers.SerializerMethodField()
@@ -20,14 +22,17 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'parent', 'icon', 'product_count']
 
     def get_product_count(self, obj):
+        # CategoryViewSet annotates active_product_count to avoid a COUNT per row
+        if hasattr(obj, 'active_product_count'):
+            return obj.active_product_count
         return obj.products.filter(is_active=True).count()
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
     vendor_name = serializers.CharField(source='vendor.company_name', read_only=True)
-    average_rating = serializers.SerializerMethodField()
-    review_count = serializers.SerializerMethodField()
+    average_rating = serializers.FloatField(read_only=True)
+    review_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Product
@@ -41,11 +46,104 @@ class ProductSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['slug', 'vendor', 'final_price', 'average_rating', 'review_count']
 
-    def get_average_rating(self, obj):
-        reviews = obj.reviews.filter(is_approved=True)
-        if reviews.exists():
-            return round(reviews.aggregate(avg=models.Avg('overall_rating'))['avg'], 1)
-        return 0.0
+    # Columns behind fields that are not plain model fields
+    FIELD_SOURCES = {
+        'category_name': ['category', 'category__name'],
+        'vendor_name': ['vendor', 'vendor__company_name'],
+        'final_price': ['price', 'discounted_price'],
+        'average_rating': ['review_count', 'overall_rating_sum'],
+        'images': [],
+    }
 
-    def get_review_count(self, obj):
-        return obj.reviews.filter(is_approved=True).count()
\ No newline at end of file
+    @classmethod
+    def prune_queryset(cls, queryset, request):
+        """Load only the columns, joins and prefetches the requested fieldset needs"""
+        selected = sparse_fieldset(request, cls.Meta.fields)
+        if selected is None:
+            return queryset
+        # FK ids are cheap and related managers read them on every row
+        columns = {'id', 'category', 'vendor'}
+        for name in selected:
+            columns.update(cls.FIELD_SOURCES.get(name, [name]))
+        if 'images' not in selected:
+            queryset = queryset.prefetch_related(None)
+        related = [relation for relation in ('category', 'vendor') if f'{relation}_name' in selected]
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
+class PreloadedCategoryField(serializers.PrimaryKeyRelatedField):
+    """Resolve category ids from the ``categories`` dict in the serializer context."""
+
+    def to_internal_value(self, data):
+        categories = self.context.get('categories')
+        if categories is None:
+            return super().to_internal_value(data)
+        try:
+            return categories[int(data)]
+        except (KeyError, TypeError, ValueError):
+            self.fail('does_not_exist', pk_value=data)
+
+
+class ProductImportSerializer(ProductSerializer):
+    """
+    Validates bulk import rows. One instance validates a whole batch, with
+    categories loaded up front instead of one query per row.
+    """
+    category = PreloadedCategoryField(queryset=Category.objects.all())
+    image_urls = serializers.ListField(
+        child=serializers.URLField(max_length=500), required=False, write_only=True
+    )
+
+    class Meta(ProductSerializer.Meta):
+        fields = [
+            'name', 'description', 'category', 'price', 'discounted_price',
+            'energy_efficiency_rating', 'carbon_footprint', 'energy_consumption',
+            'recyclable_percentage', 'certifications', 'specifications',
+            'warranty_years', 'availability', 'is_featured', 'is_active', 'image_urls'
+        ]
+
+    def validate_specifications(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("Must be a JSON object.")
+        return value
+
+
+class ProductStockUpdateSerializer(serializers.Serializer):
+    """One row of a bulk price/stock update, addressed by id or slug."""
+    id = serializers.IntegerField(required=False)
+    slug = serializers.SlugField(required=False)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    discounted_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False, allow_null=True
+    )
+    availability = serializers.IntegerField(min_value=0, required=False)
+
+    UPDATE_FIELDS = ('price', 'discounted_price', 'availability')
+
+    def validate(self, attrs):
+        if ('id' in attrs) == ('slug' in attrs):
+            raise serializers.ValidationError("Identify the product by exactly one of id or slug.")
+        if not any(field in attrs for field in self.UPDATE_FIELDS):
+            raise serializers.ValidationError("Provide price, discounted_price or availability.")
+        return attrs
+
+
+class ProductImpactSerializer(serializers.Serializer):
+    """Impact request comparing catalog products against the device they replace."""
+    product_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_SCENARIOS
+    )
+    current_consumption = serializers.FloatField(min_value=0, help_text="Replaced device, kWh/year")
+    electricity_rate = serializers.FloatField(min_value=0, default=DEFAULT_ELECTRICITY_RATE)
+
+
+class ImpactSimulationSerializer(serializers.Serializer):
+    """Options of the Monte Carlo mode of the impact endpoint."""
+    draws = serializers.IntegerField(min_value=1000, max_value=MAX_DRAWS, default=DEFAULT_DRAWS)
+    seed = serializers.IntegerField(min_value=0, default=0)
+    percentiles = serializers.ListField(
+        child=serializers.FloatField(min_value=0, max_value=100), allow_empty=False, max_length=21,
+        default=lambda: list(DEFAULT_PERCENTILES)
+    )
@@ -0,0 +1,97 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import cache as catalog_cache
+from .attributes import index_attributes
+from .category_tree import insert_category, move_category
+from .models import Category, Product, ProductImage
+from .search import index_product, unindex_product
+
+
+@receiver(pre_save, sender=Category)
+def remember_previous_category(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    previous = Category.objects.filter(pk=instance.pk).values('parent_id', 'name').first()
+    if previous:
+        instance._previous_parent_id = previous['parent_id']
+        instance._previous_name = previous['name']
+
+
+@receiver(post_save, sender=Category)
+def update_category_closure(sender, instance, created, raw=False, **kwargs):
+    """Closure rows are removed by FK cascade, so only inserts and moves need work."""
+    if raw:
+        return
+    if created:
+        insert_category(instance)
+    elif getattr(instance, '_previous_parent_id', instance.parent_id) != instance.parent_id:
+        move_category(instance)
+    instance._previous_parent_id = instance.parent_id
+
+
+@receiver(post_save, sender=Category)
+def reindex_renamed_category(sender, instance, created, raw=False, **kwargs):
+    """Category names are part of each product's search document."""
+    if raw or created:
+        return
+    if getattr(instance, '_previous_name', instance.name) != instance.name:
+        instance.products.update(updated_at=timezone.now())
+        for product in instance.products.filter(is_active=True).select_related('category'):
+            index_product(product)
+    instance._previous_name = instance.name
+
+
+@receiver(post_save, sender=Product)
+def index_saved_product(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_product(instance)
+
+
+@receiver(post_save, sender=Product)
+def index_saved_product_attributes(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_attributes([instance])
+
+
+@receiver(pre_delete, sender=Product)
+def unindex_deleted_product(sender, instance, **kwargs):
+    unindex_product(instance)
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_featured_state(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    previous = Product.objects.filter(pk=instance.pk).values('is_featured', 'is_active').first()
+    instance._was_showcased = bool(previous and previous['is_featured'] and previous['is_active'])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_caches(sender, instance, **kwargs):
+    catalog_cache.invalidate(catalog_cache.CATEGORIES, catalog_cache.FACETS)
+    # Featured lists only change when a product enters, leaves or is edited inside them
+    showcased = instance.is_featured and instance.is_active
+    if showcased or getattr(instance, '_was_showcased', False):
+        catalog_cache.invalidate(catalog_cache.FEATURED, catalog_cache.HOME)
+    instance._was_showcased = showcased
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def invalidate_product_image_caches(sender, instance, **kwargs):
+    catalog_cache.invalidate(catalog_cache.FEATURED, catalog_cache.HOME)
+    # Images are embedded in the product payload, so its ETag must change too
+    Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_caches(sender, instance, **kwargs):
+    catalog_cache.invalidate(
+        catalog_cache.FEATURED, catalog_cache.HOME, catalog_cache.CATEGORIES, catalog_cache.FACETS
+    )
@@ -0,0 +1,118 @@
+"""
+Offline similar-product recommendations.
+
+Every active product becomes a feature vector: standardized numeric
+metrics (price, carbon footprint and energy consumption on a log scale,
+recyclable percentage, efficiency rank) plus one-hot certification and
+category, weighted so that products from the same category end up close.
+The k nearest neighbours by Euclidean distance are computed with NumPy in
+row blocks, keeping memory at roughly ``MAX_BLOCK_CELLS`` floats regardless
+of catalog size, and stored as SimilarProduct rows. Readers then need a
+single indexed query on (product, rank).
+"""
+import numpy as np
+from django.db import transaction
+
+from .models import Product, SimilarProduct
+
+DEFAULT_NEIGHBOURS = 8
+MAX_BLOCK_CELLS = 20_000_000  # float32 distances held at once, ~80 MB
+LOG_SCALED_FEATURES = ['price', 'carbon_footprint', 'energy_consumption']
+LINEAR_FEATURES = ['recyclable_percentage', 'energy_efficiency_rank']
+CERTIFICATION_WEIGHT = 1.0
+CATEGORY_WEIGHT = 3.0
+
+
+def _standardize(matrix):
+    std = matrix.std(axis=0)
+    std[std == 0] = 1
+    return (matrix - matrix.mean(axis=0)) / std
+
+
+def _one_hot(values, weight):
+    levels = {value: index for index, value in enumerate(sorted(set(values)))}
+    encoded = np.zeros((len(values), len(levels)), dtype=np.float32)
+    encoded[np.arange(len(values)), [levels[value] for value in values]] = weight
+    return encoded
+
+
+def feature_matrix(rows):
+    """Rows of ``Product.values()`` to an (n, features) float32 matrix."""
+    log_scaled = np.log1p(np.maximum(np.array(
+        [[float(row[field]) for field in LOG_SCALED_FEATURES] for row in rows], dtype=np.float64
+    ), 0))
+    linear = np.array([[float(row[field]) for field in LINEAR_FEATURES] for row in rows], dtype=np.float64)
+    numeric = _standardize(np.hstack([log_scaled, linear])).astype(np.float32)
+    return np.hstack([
+        numeric,
+        _one_hot([row['certifications'] for row in rows], CERTIFICATION_WEIGHT),
+        _one_hot([row['category_id'] for row in rows], CATEGORY_WEIGHT),
+    ])
+
+
+def nearest_neighbours(features, k):
+    """
+    Yield ``(row, neighbour_rows, distances)`` for every row, nearest first.
+
+    Squared distances come from ||a||^2 + ||b||^2 - 2ab, one block of rows
+    against the whole matrix at a time.
+    """
+    count = len(features)
+    k = min(k, count - 1)
+    if k <= 0:
+        return
+    norms = np.einsum('ij,ij->i', features, features)
+    block = max(1, MAX_BLOCK_CELLS // count)
+    for start in range(0, count, block):
+        stop = min(start + block, count)
+        distances = norms[start:stop, None] + norms[None, :] - 2 * features[start:stop] @ features.T
+        distances[np.arange(stop - start), np.arange(start, stop)] = np.inf
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        nearest_distances = np.take_along_axis(distances, nearest, axis=1)
+        order = np.argsort(nearest_distances, axis=1, kind='stable')
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        nearest_distances = np.sqrt(np.maximum(np.take_along_axis(nearest_distances, order, axis=1), 0))
+        for offset in range(stop - start):
+            yield start + offset, nearest[offset], nearest_distances[offset]
+
+
+def build_similar_products(k=DEFAULT_NEIGHBOURS, batch_size=1000):
+    """
+    Recompute and store the k nearest neighbours of every active product. Returns rows written.
+
+    Links are written batch_size at a time as the neighbour blocks are
+    computed, so at most one batch is held in memory. The old links are
+    replaced in one transaction, so readers never see a partial table.
+    """
+    rows = list(Product.objects.filter(is_active=True).order_by('id').values(
+        'id', 'category_id', 'certifications', *LOG_SCALED_FEATURES, *LINEAR_FEATURES
+    ))
+    ids = [row['id'] for row in rows]
+    features = feature_matrix(rows) if len(rows) > 1 else None
+    del rows
+
+    written = 0
+    links = []
+    with transaction.atomic():
+        SimilarProduct.objects.all().delete()
+        if features is None:
+            return written
+        for index, neighbours, distances in nearest_neighbours(features, k):
+            links.extend(
+                SimilarProduct(product_id=ids[index], similar_id=ids[neighbour], rank=rank, distance=float(distance))
+                for rank, (neighbour, distance) in enumerate(zip(neighbours, distances))
+            )
+            if len(links) >= batch_size:
+                SimilarProduct.objects.bulk_create(links)
+                written += len(links)
+                links = []
+        SimilarProduct.objects.bulk_create(links)
+        written += len(links)
+    return written
+
+
+def similar_products(product):
+    """Active stored neighbours of ``product``, most similar first."""
+    return Product.objects.filter(
+        similar_to_links__product=product, is_active=True
+    ).order_by('similar_to_links__rank')
@@ -1,3 +1,191 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError
 from django.test import TestCase
 
-# Create your tests here.
+from vendors.models import Vendor
+
+from . import bulk_import, search
+from .models import Category, Product, SimilarProduct
+from .similarity import build_similar_products
+
+User = get_user_model()
+
+
+class StreamProductListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        vendor = Vendor.objects.create(
+            user=User.objects.create_user('vendor', user_type='vendor'), company_name='Green Co',
+            business_license='L-1', tax_id='T-1', business_address='1 Green St', contact_phone='555',
+            description='Vendor'
+        )
+        category = Category.objects.create(name='Energy', description='Energy')
+        for index, price in enumerate([30, 10, 20, 10, 50, 40, 10]):
+            Product.objects.create(
+                name=f'Streamed product {index}', description='Product', category=category, vendor=vendor,
+                price=price, energy_efficiency_rating='A', carbon_footprint=1, energy_consumption=1,
+                slug=f'streamed-product-{index}'
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_streams_every_product_in_order_across_chunks(self):
+        with mock.patch('products.views.CATALOG_STREAM_CHUNK_SIZE', 2):
+            response = self.client.get('/products/?stream=1&ordering=price')
+            chunks = [chunk.decode() for chunk in response.streaming_content]
+        body = ''.join(chunks)
+        expected = list(Product.objects.order_by('price', 'pk').values_list('name', flat=True))
+        positions = [body.index(name) for name in expected]
+        self.assertEqual(positions, sorted(positions))
+        self.assertTrue(all(body.count(f'{name}<') == 1 for name in expected))
+        # Shell head, four card chunks and the shell tail
+        self.assertEqual(len(chunks), 6)
+
+    def test_empty_catalog(self):
+        response = self.client.get('/products/?stream=1&price_min=1000')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Streamed product', ''.join(chunk.decode() for chunk in response.streaming_content))
+
+
+class ImportProductsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vendor = Vendor.objects.create(
+            user=User.objects.create_user('importer', user_type='vendor'), company_name='Import Co',
+            business_license='L-1', tax_id='T-1', business_address='1 Green St', contact_phone='555',
+            description='Vendor'
+        )
+        self.category = Category.objects.create(name='Energy', description='Energy')
+
+    def stream(self, count):
+        return io.BytesIO(''.join(json.dumps({
+            'name': f'Imported {index}', 'description': 'Product', 'category': self.category.pk,
+            'price': '9.99', 'energy_efficiency_rating': 'A', 'carbon_footprint': 1, 'energy_consumption': 1,
+        }) + '\n' for index in range(count)).encode())
+
+    def test_summary_line(self):
+        report = list(bulk_import.import_products(self.stream(5), 'jsonl', self.vendor, batch_size=2))
+        self.assertEqual(report, [{'created': 5, 'failed': 0, 'rows': 5}])
+
+    def fail_second_batch(self):
+        create_products = bulk_import._create_products
+        calls = []
+
+        def create_or_fail(rows, vendor):
+            calls.append(len(rows))
+            if len(calls) == 2:
+                raise DatabaseError('connection lost')
+            return create_products(rows, vendor)
+
+        return mock.patch.object(bulk_import, '_create_products', side_effect=create_or_fail)
+
+    def test_failure_mid_stream_ends_with_an_error_line(self):
+        with self.fail_second_batch(), self.assertLogs('products.bulk_import', 'ERROR'):
+            report = list(bulk_import.import_products(self.stream(5), 'jsonl', self.vendor, batch_size=2))
+        self.assertEqual(report, [{'error': 'Import stopped by an unexpected error', 'created': 2}])
+        self.assertEqual(Product.objects.filter(vendor=self.vendor).count(), 2)
+
+    def test_command_fails_when_the_import_stops(self):
+        with tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False) as upload:
+            upload.write(self.stream(5).getvalue())
+        self.addCleanup(os.remove, upload.name)
+
+        with self.fail_second_batch(), self.assertLogs('products.bulk_import', 'ERROR'):
+            with self.assertRaisesMessage(CommandError, '2 products were created before it stopped'):
+                call_command('import_products', upload.name, vendor=self.vendor.pk, batch_size=2, stdout=io.StringIO())
+
+
+class SearchProductsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        vendor = Vendor.objects.create(
+            user=User.objects.create_user('vendor', user_type='vendor'), company_name='Green Co',
+            business_license='L-1', tax_id='T-1', business_address='1 Green St', contact_phone='555',
+            description='Vendor'
+        )
+        category = Category.objects.create(name='Energy', description='Energy')
+
+        def product(name, description):
+            return Product.objects.create(
+                name=name, description=description, category=category, vendor=vendor, price=10,
+                energy_efficiency_rating='A', carbon_footprint=1, energy_consumption=1,
+                slug=name.lower().replace(' ', '-')
+            )
+
+        cls.panels = [product(f'Solar panel {index}', 'Solar solar power') for index in range(4)]
+        cls.lamp = product('Garden lamp', 'Charged by a small solar cell')
+        cls.heater = product('Water heater', 'Heats water with solar energy')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_ranks_and_requires_every_term(self):
+        ids, truncated = search.search_products('solar')
+        self.assertEqual(set(ids), {p.pk for p in self.panels} | {self.lamp.pk, self.heater.pk})
+        self.assertEqual(set(ids[:4]), {p.pk for p in self.panels})
+        self.assertFalse(truncated)
+        self.assertEqual(search.search_products('solar lamp'), ([self.lamp.pk], False))
+
+    def test_postings_per_term_are_capped(self):
+        with mock.patch.object(search, 'MAX_POSTINGS_PER_TERM', 2):
+            ids, truncated = search.search_products('solar')
+            self.assertTrue(truncated)
+            self.assertEqual(len(ids), 2)
+            self.assertTrue(set(ids) <= {p.pk for p in self.panels})
+            # The lamp's "solar" posting is outside the top list but still confirms the match
+            self.assertEqual(search.search_products('garden solar'), ([self.lamp.pk], True))
+
+    def test_prefix_expansions_are_capped(self):
+        with mock.patch.object(search, 'MAX_PREFIX_EXPANSIONS', 1):
+            self.assertEqual(search.search_products('water he'), ([self.heater.pk], True))
+        self.assertEqual(search.search_products('water he'), ([self.heater.pk], False))
+
+    def test_search_endpoint_reports_truncation(self):
+        response = self.client.get('/api/products/search/?q=solar')
+        self.assertFalse(response.json()['truncated'])
+        with mock.patch.object(search, 'MAX_POSTINGS_PER_TERM', 2):
+            response = self.client.get('/api/products/search/?q=solar')
+        self.assertTrue(response.json()['truncated'])
+        self.assertEqual(len(response.json()['results']), 2)
+
+
+class BuildSimilarProductsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        vendor = Vendor.objects.create(
+            user=User.objects.create_user('vendor', user_type='vendor'), company_name='Green Co',
+            business_license='L-1', tax_id='T-1', business_address='1 Green St', contact_phone='555',
+            description='Vendor'
+        )
+        category = Category.objects.create(name='Energy', description='Energy')
+        cls.products = [
+            Product.objects.create(
+                name=f'Similar product {index}', description='Product', category=category, vendor=vendor,
+                price=10 * (index + 1), energy_efficiency_rating='A', carbon_footprint=1, energy_consumption=1,
+                slug=f'similar-product-{index}'
+            )
+            for index in range(6)
+        ]
+
+    def test_links_are_written_in_batches(self):
+        SimilarProduct.objects.create(product=self.products[0], similar=self.products[5], rank=0, distance=9)
+        with mock.patch.object(SimilarProduct.objects, 'bulk_create', wraps=SimilarProduct.objects.bulk_create) as bulk:
+            self.assertEqual(build_similar_products(k=2, batch_size=4), 12)
+        self.assertTrue(all(len(call.args[0]) <= 4 for call in bulk.call_args_list))
+        self.assertGreater(bulk.call_count, 2)
+
+        self.assertEqual(SimilarProduct.objects.count(), 12)
+        # Prices 10, 20, ... put each product next to its price neighbours
+        self.assertEqual(
+            list(SimilarProduct.objects.filter(product=self.products[0]).order_by('rank').values_list('similar', flat=True)),
+            [self.products[1].pk, self.products[2].pk]
+        )
@@ -3,14 +3,15 @@ from rest_framework.routers import DefaultRouter
 from . import views
 
 router = DefaultRouter()
-router.register(r'', views.ProductViewSet, basename='product')
+# Categories first: the product detail route would otherwise swallow 'categories/'
 router.register(r'categories', views.CategoryViewSet, basename='category')
+router.register(r'', views.ProductViewSet, basename='product')
 
 app_name = 'products'
 
 urlpatterns = [
-    # API endpoints only
-    path('', include(router.urls)),
+    # API endpoints only; fixed paths go before the router's product detail route
     path('search/', views.ProductSearchView.as_view(), name='search'),
     path('featured/', views.FeaturedProductsView.as_view(), name='featured'),
+    path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,34 +1,57 @@
+import json
+
+from django.core.paginator import Paginator
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q, Avg, Count
-from rest_framework import viewsets, filters, status, generics
+from django.template.loader import get_template, render_to_string
+from django.views.decorators.http import condition
+from django.db.models import Q, Avg, Count, Max, OuterRef, Subquery
+from rest_framework import viewsets, status, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Product, Category, ProductImage
-from .serializers import ProductSerializer, CategorySerializer, ProductImageSerializer
-from .filters import ProductFilter
+from .models import Product, Category, ProductImage, SimilarProduct
+from .serializers import (
+    ProductSerializer, CategorySerializer, ProductImageSerializer, ProductImpactSerializer, ImpactSimulationSerializer,
+)
+from .filters import ProductFilter, ProductOrderingFilter, ProductSearchFilter
+from .search import filter_products, search_products
+from .facets import compute_facets
+from .attributes import attribute_facets
+from .similarity import similar_products
+from .impact import MAX_SCENARIOS, MAX_SIMULATION_CELLS, product_impact, scenario_impact
+from .bulk_import import detect_format, import_products
+from .bulk_update import MAX_ROWS as MAX_UPDATE_ROWS, update_products
+from .fast_serializers import FastProductListMixin
+from . import cache as catalog_cache
+from .category_tree import build_category_tree
 from .permissions import IsVendorOrReadOnly
+from api.conditional import ConditionalGetMixin, resource_etag
+from api.pagination import PageOrKeysetPagination, keyset_chunks
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ConditionalGetMixin, FastProductListMixin, viewsets.ModelViewSet):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsVendorOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = PageOrKeysetPagination
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, ProductOrderingFilter]
     filterset_class = ProductFilter
-    search_fields = ['name', 'description', 'category__name']
-    ordering_fields = ['price', 'created_at', 'energy_efficiency_rating', 'carbon_footprint']
+    search_fields = ['name', 'description', 'category__name']  # Indexed by products.search
+    ordering_fields = ['price', 'created_at', 'energy_efficiency_rating', 'energy_efficiency_rank', 'carbon_footprint']
     ordering = ['-created_at']
+    # Image, review aggregate and category name changes touch Product.updated_at
+    conditional_fields = ('updated_at', 'vendor__updated_at')
 
     def get_queryset(self):
-        queryset = Product.objects.filter(is_active=True).select_related('category', 'vendor')
+        queryset = Product.objects.filter(is_active=True).for_listing()
         
         # Filter by vendor for vendor users
         if self.request.user.is_authenticated and self.request.user.user_type == 'vendor':
             if self.action in ['list'] and self.request.query_params.get('my_products'):
                 queryset = queryset.filter(vendor__user=self.request.user)
         
-        return queryset
+        return ProductSerializer.prune_queryset(queryset, self.request)
 
     def perform_create(self, serializer):
         if self.request.user.user_type != 'vendor':
@@ -46,6 +69,63 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(products, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """
+        Import products from a CSV or JSON Lines body (or a multipart ``file``).
+
+        The response streams one JSON line per rejected row followed by a
+        summary line (or an error line if the import had to stop), while the
+        upload is still being processed.
+        """
+        if request.user.user_type != 'vendor':
+            return Response({"error": "Only vendors can import products"},
+                          status=status.HTTP_403_FORBIDDEN)
+
+        if request.content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({"error": "Upload the rows as 'file'"}, status=status.HTTP_400_BAD_REQUEST)
+            stream, name = upload, upload.name
+        else:
+            # Read the raw body incrementally instead of parsing it into request.data
+            stream, name = request._request, ''
+        file_format = detect_format(request.query_params.get('file_format'), name, request.content_type)
+        if file_format is None:
+            return Response({"error": "Send CSV or JSON Lines, or pass ?file_format=csv|jsonl"},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        report = import_products(stream, file_format, request.user.vendor_profile)
+        return StreamingHttpResponse(
+            (json.dumps(entry) + '\n' for entry in report),
+            content_type='application/x-ndjson'
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request):
+        """Update price, discounted_price and availability of many own products at once"""
+        if request.user.user_type != 'vendor':
+            return Response({"error": "Only vendors can update products"},
+                          status=status.HTTP_403_FORBIDDEN)
+
+        rows = request.data.get('products') if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list):
+            return Response({"error": "Send a list of product rows"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > MAX_UPDATE_ROWS:
+            return Response({"error": f"At most {MAX_UPDATE_ROWS} rows per request"},
+                          status=status.HTTP_400_BAD_REQUEST)
+        return Response(update_products(rows, request.user.vendor_profile))
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """Precomputed nearest neighbours of this product, most similar first"""
+        product = self.get_object()
+        neighbours = ProductSerializer.prune_queryset(
+            similar_products(product).for_listing(), request
+        )
+        serializer = self.get_serializer(neighbours, many=True)
+        return Response(serializer.data)
+
     @action(detail=True, methods=['post'])
     def toggle_featured(self, request, pk=None):
         """Toggle featured status - Admin only"""
@@ -59,15 +139,38 @@ class ProductViewSet(viewsets.ModelViewSet):
         return Response({"is_featured": product.is_featured})
 
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Category.objects.all()
+    queryset = Category.objects.annotate(
+        active_product_count=Count('products', filter=Q(products__is_active=True))
+    ).order_by('id')
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def list(self, request, *args, **kwargs):
+        data = catalog_cache.cached(
+            catalog_cache.CATEGORIES, request.build_absolute_uri(),
+            lambda: super(CategoryViewSet, self).list(request, *args, **kwargs).data
+        )
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """Whole category tree with own and rolled-up active product counts"""
+        return Response(catalog_cache.cached(catalog_cache.CATEGORIES, 'tree', build_category_tree))
+
+    @action(detail=True, methods=['get'])
+    def attributes(self, request, pk=None):
+        """Specification facets of the category's active products"""
+        category = self.get_object()
+        include_descendants = request.query_params.get('include_descendants') in ('true', 'True', '1')
+        return Response(attribute_facets(category, include_descendants=include_descendants))
+
     @action(detail=True, methods=['get'])
     def products(self, request, pk=None):
         """Get products in this category"""
         category = self.get_object()
-        products = Product.objects.filter(category=category, is_active=True)
+        products = ProductSerializer.prune_queryset(
+            Product.objects.filter(category=category, is_active=True).for_listing(), request
+        )
         serializer = ProductSerializer(products, many=True, context={'request': request})
         return Response(serializer.data)
 
@@ -75,22 +178,59 @@ class ProductSearchView(generics.ListAPIView):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def get_search_filters(self):
+        params = self.request.query_params
+        return {
+            'min_price': params.get('min_price'),
+            'max_price': params.get('max_price'),
+            'category': params.get('category'),
+            'certification': params.get('certification'),
+        }
+
+    def list(self, request, *args, **kwargs):
+        """
+        Rank ?q= matches with BM25 over the search index, then load only the
+        page. ``truncated`` in the response says the ranking hit one of the
+        search caps (posting lists per term, prefix expansions).
+        """
+        query = request.query_params.get('q', '')
+        self.truncated = False
+        if not query.strip():
+            return super().list(request, *args, **kwargs)
+
+        ranked_ids, self.truncated = search_products(query, **self.get_search_filters())
+        page = self.paginate_queryset(ranked_ids)
+        ids = page if page is not None else ranked_ids
+        products = Product.objects.filter(is_active=True).for_listing().in_bulk(ids)
+        serializer = self.get_serializer(
+            [products[pk] for pk in ids if pk in products], many=True
+        )
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        search_filters = self.get_search_filters()
+        response.data['truncated'] = self.truncated
+        response.data['facets'] = compute_facets(
+            search=self.request.query_params.get('q', ''),
+            category=[search_filters['category']],
+            certification=[search_filters['certification']],
+            price_min=search_filters['min_price'],
+            price_max=search_filters['max_price'],
+        )
+        return response
+
     def get_queryset(self):
-        query = self.request.query_params.get('q', '')
-        min_price = self.request.query_params.get('min_price')
-        max_price = self.request.query_params.get('max_price')
-        category = self.request.query_params.get('category')
-        certification = self.request.query_params.get('certification')
-        
-        queryset = Product.objects.filter(is_active=True)
-        
-        if query:
-            queryset = queryset.filter(
-                Q(name__icontains=query) | 
-                Q(description__icontains=query) |
-                Q(category__name__icontains=query)
-            )
-        
+        search_filters = self.get_search_filters()
+        min_price = search_filters['min_price']
+        max_price = search_filters['max_price']
+        category = search_filters['category']
+        certification = search_filters['certification']
+
+        queryset = Product.objects.filter(is_active=True).for_listing()
+
         if min_price:
             queryset = queryset.filter(price__gte=min_price)
         if max_price:
@@ -102,31 +242,89 @@ class ProductSearchView(generics.ListAPIView):
             
         return queryset
 
-class FeaturedProductsView(generics.ListAPIView):
+class FeaturedProductsView(FastProductListMixin, generics.ListAPIView):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     
     def get_queryset(self):
-        return Product.objects.filter(is_featured=True, is_active=True)[:8]
+        return Product.objects.filter(
+            is_featured=True, is_active=True
+        ).for_listing().order_by('-created_at')[:8]
+
+    def list(self, request, *args, **kwargs):
+        data = catalog_cache.cached(
+            catalog_cache.FEATURED, request.build_absolute_uri(),
+            lambda: super(FeaturedProductsView, self).list(request, *args, **kwargs).data
+        )
+        return Response(data)
+
+class ImpactView(APIView):
+    """
+    Savings of many scenarios at once, computed server-side.
+
+    POST either ``{"scenarios": [{device_type, current_consumption,
+    energy_reduction, electricity_rate, hours_daily}, ...]}`` or
+    ``{"product_ids": [...], "current_consumption": ..., "electricity_rate": ...}``
+    to compare catalog products against the device they replace. ``results``
+    holds one list per figure, aligned with the input order. Add
+    ``"simulation": true`` (or ``{draws, seed, percentiles}``) for Monte Carlo
+    percentiles.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        simulation = data.get('simulation')
+        if simulation:
+            options = ImpactSimulationSerializer(data=simulation if isinstance(simulation, dict) else {})
+            options.is_valid(raise_exception=True)
+            simulation = options.validated_data
+        else:
+            simulation = None
+
+        if 'scenarios' in data:
+            scenarios = data['scenarios']
+            if not isinstance(scenarios, list) or not scenarios:
+                return Response({"error": "Send a non-empty list of scenarios"}, status=status.HTTP_400_BAD_REQUEST)
+            count = len(scenarios)
+        elif 'product_ids' in data:
+            serializer = ProductImpactSerializer(data=data)
+            serializer.is_valid(raise_exception=True)
+            count = len(serializer.validated_data['product_ids'])
+        else:
+            return Response({"error": "Send scenarios or product_ids"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if count > MAX_SCENARIOS:
+            return Response({"error": f"At most {MAX_SCENARIOS} scenarios per request"},
+                          status=status.HTTP_400_BAD_REQUEST)
+        if simulation and count * simulation['draws'] > MAX_SIMULATION_CELLS:
+            return Response({"error": f"Simulate at most {MAX_SIMULATION_CELLS} scenario draws per request"},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        if 'scenarios' in data:
+            return Response(scenario_impact(scenarios, simulation))
+        return Response(product_impact(**serializer.validated_data, simulation=simulation))
 
 # Web Views for traditional Django templates
 def home_view(request):
-    featured_products = Product.objects.filter(is_featured=True, is_active=True)[:6]
-    categories = Category.objects.all()[:8]
+    featured_products, categories = catalog_cache.cached(catalog_cache.HOME, 'home', lambda: (
+        list(Product.objects.filter(is_featured=True, is_active=True).for_listing()[:6]),
+        list(Category.objects.all()[:8]),
+    ))
     return render(request, 'base/home.html', {
         'featured_products': featured_products,
         'categories': categories,
     })
 
-def product_list_view(request):
-    products = Product.objects.filter(is_active=True)
+CATALOG_PAGE_SIZE = 12
+CATALOG_STREAM_CHUNK_SIZE = 50
+CATALOG_CARDS_PLACEHOLDER = '<!-- product-cards -->'
+RELATED_PRODUCTS_COUNT = 4
 
-    # Annotate categories with product count
-    categories = Category.objects.annotate(
-        product_count=Count('products', filter=Q(products__is_active=True))
-    )
+def filter_catalog(request):
+    """Apply the catalog sidebar, search and ordering parameters"""
+    products = Product.objects.filter(is_active=True).for_listing()
 
-    # Apply filters
     category_filter = request.GET.getlist('category')
     if category_filter:
         products = products.filter(category__id__in=category_filter)
@@ -149,29 +347,126 @@ def product_list_view(request):
 
     search = request.GET.get('search')
     if search:
-        products = products.filter(
-            Q(name__icontains=search) |
-            Q(description__icontains=search)
-        )
+        products = filter_products(products, search)
 
-    # Apply ordering
+    # Apply ordering; id breaks ties so pages never overlap
     ordering = request.GET.get('ordering', '-created_at')
-    if ordering in ['price', '-price', 'energy_efficiency_rating',
-                    '-energy_efficiency_rating', 'carbon_footprint',
-                    '-carbon_footprint', '-created_at']:
-        products = products.order_by(ordering)
+    if ordering not in ['price', '-price', 'energy_efficiency_rating',
+                        '-energy_efficiency_rating', 'carbon_footprint',
+                        '-carbon_footprint', '-created_at']:
+        ordering = '-created_at'
+    # Ratings sort by their numeric rank (best first), not as strings
+    ordering = ordering.replace('energy_efficiency_rating', 'energy_efficiency_rank')
+    return products.order_by(ordering, 'id')
 
-    return render(request, 'base/product_list.html', {
-        'products': products,
-        'categories': categories,
-    })
+def catalog_facets(request):
+    """Sidebar facet counts for the current filters, with a querystring per price band"""
+    facets = compute_facets(
+        search=request.GET.get('search', ''),
+        category=request.GET.getlist('category'),
+        certification=[request.GET.get('certification')],
+        energy_efficiency=[request.GET.get('energy_efficiency')],
+        price_min=request.GET.get('price_min'),
+        price_max=request.GET.get('price_max'),
+    )
+    for band in facets['price']:
+        querystring = request.GET.copy()
+        for param in ('page', 'price_min', 'price_max'):
+            querystring.pop(param, None)
+        if band['min'] is not None:
+            querystring['price_min'] = band['min']
+        if band['max'] is not None:
+            querystring['price_max'] = band['max']
+        band['querystring'] = querystring.urlencode()
+    return facets
+
+def product_list_view(request):
+    products = filter_catalog(request)
+    context = {'facets': catalog_facets(request)}
+
+    if request.GET.get('stream'):
+        return stream_product_list(request, products, context)
+
+    page = Paginator(products, CATALOG_PAGE_SIZE).get_page(request.GET.get('page'))
+    querystring = request.GET.copy()
+    querystring.pop('page', None)
+    context.update(products=page, querystring=querystring.urlencode())
+    return render(request, 'base/product_list.html', context)
+
+def stream_product_list(request, products, context):
+    """
+    Stream the whole filtered catalog: the page shell is sent first, then
+    product cards are rendered chunk by chunk. Each chunk is its own keyset
+    query, so nothing waits for (or buffers) the full result set, even on
+    MySQL where iterator() has no server-side cursor.
+    """
+    shell = render_to_string(
+        'base/product_list.html', {**context, 'streaming': True}, request=request
+    )
+    head, tail = shell.split(CATALOG_CARDS_PLACEHOLDER, 1)
+    card_template = get_template('base/product_card.html')
+
+    def render_cards():
+        yield head
+        rendered_any = False
+        for chunk in keyset_chunks(products, CATALOG_STREAM_CHUNK_SIZE):
+            yield ''.join(card_template.render({'product': product}, request) for product in chunk)
+            rendered_any = True
+        if not rendered_any:
+            yield render_to_string('base/product_list_empty.html', request=request)
+        yield tail
+
+    return StreamingHttpResponse(render_cards(), content_type='text/html; charset=utf-8')
+
+def product_detail_version(request, slug):
+    """
+    Timestamps of everything the detail page renders, read in one query and
+    memoized on the request for the ETag and Last-Modified callbacks.
+    """
+    if not hasattr(request, '_product_detail_version'):
+        similar_updated_at = Product.objects.filter(
+            similar_to_links__product=OuterRef('pk'), is_active=True
+        ).order_by('-updated_at').values('updated_at')[:1]
+        similar_built_at = SimilarProduct.objects.filter(
+            product=OuterRef('pk')
+        ).order_by('-created_at').values('created_at')[:1]
+        # Products without neighbours yet fall back to same-category products
+        related_updated_at = Product.objects.filter(
+            category=OuterRef('category'), is_active=True
+        ).order_by('-updated_at').values('updated_at')[:1]
+        request._product_detail_version = Product.objects.filter(
+            slug=slug, is_active=True
+        ).annotate(
+            reviews_updated_at=Max('reviews__updated_at'),
+            similar_updated_at=Subquery(similar_updated_at),
+            similar_built_at=Subquery(similar_built_at),
+            related_updated_at=Subquery(related_updated_at),
+        ).values_list(
+            'updated_at', 'vendor__updated_at', 'reviews_updated_at',
+            'similar_updated_at', 'similar_built_at', 'related_updated_at'
+        ).first()
+    return request._product_detail_version
+
+def product_detail_etag(request, slug):
+    version = product_detail_version(request, slug)
+    return resource_etag(request, version) if version else None
+
+def product_detail_last_modified(request, slug):
+    version = product_detail_version(request, slug)
+    if not version:
+        return None
+    return max(value for value in version if value is not None)
 
+@condition(etag_func=product_detail_etag, last_modified_func=product_detail_last_modified)
 def product_detail_view(request, slug):
-    product = get_object_or_404(Product, slug=slug, is_active=True)
-    related_products = Product.objects.filter(
-        category=product.category,
-        is_active=True
-    ).exclude(id=product.id)[:4]
+    product = get_object_or_404(Product.objects.for_listing(), slug=slug, is_active=True)
+    related_products = list(similar_products(product).with_images()[:RELATED_PRODUCTS_COUNT])
+    if not related_products:
+        # Not yet covered by build_similar_products
+        related_products = Product.objects.filter(
+            category=product.category,
+            is_active=True
+        ).exclude(id=product.id).with_images()[:RELATED_PRODUCTS_COUNT]
 
     # Calculate discount percentage
     discount_percentage = 0
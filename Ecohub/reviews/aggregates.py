@@ -0,0 +1,164 @@
+"""
+Denormalized review aggregates stored on Product.
+
+Only approved reviews count towards a product's aggregates. Writes go
+through ``apply_review_change`` which adjusts the stored counters with a
+single ``F()`` update, so concurrent review writes never lose increments.
+"""
+from django.db import transaction
+from django.db.models import Avg, Count, F, Q, Sum
+from django.utils import timezone
+
+from products import cache as catalog_cache
+from products.models import Product
+
+RATING_SCALE = range(1, 6)
+# Keys of the per-dimension statistics in ProductReviewsView
+RATING_DIMENSIONS = {
+    'overall_rating': 'overall',
+    'eco_impact_rating': 'eco_impact',
+    'value_for_money': 'value_for_money',
+    'build_quality': 'build_quality',
+}
+RATING_FIELDS = {
+    'overall_rating': 'overall_rating_sum',
+    'eco_impact_rating': 'eco_impact_rating_sum',
+    'value_for_money': 'value_for_money_sum',
+    'build_quality': 'build_quality_sum',
+}
+
+
+def review_contribution(review):
+    """Return (product_id, {aggregate_field: value}) for a review, or None."""
+    if review is None or not review.is_approved:
+        return None
+    contribution = {'review_count': 1}
+    for rating_field, sum_field in RATING_FIELDS.items():
+        contribution[sum_field] = getattr(review, rating_field)
+    return review.product_id, contribution
+
+
+def apply_review_change(old, new):
+    """
+    Move a product's aggregates from an old review contribution to a new one.
+
+    Returns True when any stored aggregate changed.
+    """
+    deltas = {}
+    for contribution, sign in ((old, -1), (new, 1)):
+        if contribution is None:
+            continue
+        product_id, values = contribution
+        product_deltas = deltas.setdefault(product_id, {})
+        for field, value in values.items():
+            product_deltas[field] = product_deltas.get(field, 0) + sign * value
+
+    changed = False
+    for product_id, product_deltas in deltas.items():
+        updates = {
+            field: F(field) + delta
+            for field, delta in product_deltas.items() if delta
+        }
+        if updates:
+            # Touch updated_at too: the ratings are part of the product's representation
+            Product.objects.filter(pk=product_id).update(updated_at=timezone.now(), **updates)
+            changed = True
+    return changed
+
+
+def rebuild_product_aggregates(product_ids=None, batch_size=500):
+    """
+    Recompute aggregates from the reviews table.
+
+    Rebuilds every product when ``product_ids`` is None, otherwise only the
+    given products. Returns the number of products that have approved reviews.
+    """
+    from .models import Review
+
+    products = Product.objects.all()
+    reviews = Review.objects.filter(is_approved=True)
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        products = products.filter(pk__in=product_ids)
+        reviews = reviews.filter(product_id__in=product_ids)
+
+    rows = reviews.order_by().values('product_id').annotate(
+        review_count=Count('id'),
+        **{sum_field: Sum(rating_field) for rating_field, sum_field in RATING_FIELDS.items()}
+    )
+    aggregate_fields = ['review_count', *RATING_FIELDS.values()]
+
+    rebuilt = 0
+    with transaction.atomic():
+        products.update(**{field: 0 for field in aggregate_fields})
+        batch = []
+        for row in rows.iterator():
+            batch.append(Product(
+                pk=row['product_id'],
+                **{field: row[field] for field in aggregate_fields}
+            ))
+            if len(batch) >= batch_size:
+                Product.objects.bulk_update(batch, aggregate_fields)
+                rebuilt += len(batch)
+                batch = []
+        if batch:
+            Product.objects.bulk_update(batch, aggregate_fields)
+            rebuilt += len(batch)
+        # Not before commit, or a concurrent reader could cache the old aggregates again
+        transaction.on_commit(invalidate_featured)
+    return rebuilt
+
+
+def invalidate_featured():
+    # Featured product payloads embed average_rating and review_count
+    catalog_cache.invalidate(catalog_cache.FEATURED)
+
+
+def _statistics_namespace(product_id):
+    return f'{catalog_cache.REVIEW_STATS}:{product_id}'
+
+
+def invalidate_review_statistics(*product_ids):
+    """Invalidate the products' cached statistics once the current transaction commits."""
+    namespaces = [_statistics_namespace(product_id) for product_id in set(product_ids)]
+    transaction.on_commit(lambda: catalog_cache.invalidate(*namespaces))
+
+
+def _compute_review_statistics(product_id):
+    from .models import Review
+
+    aggregates = {
+        'total': Count('id'),
+        'recommended': Count('id', filter=Q(would_recommend=True)),
+    }
+    for field in RATING_DIMENSIONS:
+        aggregates[f'{field}__avg'] = Avg(field)
+        for stars in RATING_SCALE:
+            aggregates[f'{field}__{stars}'] = Count('id', filter=Q(**{field: stars}))
+    row = Review.objects.filter(product_id=product_id, is_approved=True).aggregate(**aggregates)
+
+    total = row['total']
+    return {
+        'total_reviews': total,
+        'average_ratings': {
+            name: round(row[f'{field}__avg'], 2) if row[f'{field}__avg'] else 0
+            for field, name in RATING_DIMENSIONS.items()
+        },
+        'rating_histograms': {
+            name: {stars: row[f'{field}__{stars}'] for stars in RATING_SCALE}
+            for field, name in RATING_DIMENSIONS.items()
+        },
+        'would_recommend_ratio': round(row['recommended'] / total, 3) if total else None,
+    }
+
+
+def review_statistics(product_id):
+    """
+    Totals, averages, 1-5 star histograms and the would_recommend ratio of a
+    product's approved reviews: one aggregate query, cached until a review
+    of the product is written.
+    """
+    return catalog_cache.cached(
+        _statistics_namespace(product_id), 'statistics',
+        lambda: _compute_review_statistics(product_id)
+    )
@@ -0,0 +1,139 @@
+"""
+Near-duplicate review detection with MinHash and locality-sensitive hashing.
+
+A review's title and comment become a set of word 3-gram shingles,
+summarized by a MinHash signature of SIGNATURE_SIZE values. The signature
+is cut into BANDS bands, and each band is hashed to one ReviewBucket key.
+Reviews whose Jaccard similarity is above roughly (1/BANDS)^(1/ROWS) are
+likely to share a key, so finding candidates is a single indexed IN query
+rather than a comparison against every review. Candidates are then
+confirmed on their estimated similarity.
+
+Reviews are indexed as they are created. A review matching an earlier one
+joins that review's cluster, and the moderation queue shows it flagged.
+Reviews written before the index existed are added by
+rebuild_duplicate_index (the ``rebuild_duplicate_index`` command).
+"""
+import re
+import zlib
+
+import numpy as np
+from django.db import transaction
+
+from .models import Review, ReviewBucket, ReviewFingerprint
+
+SHINGLE_SIZE = 3  # words
+MIN_SHINGLES = 5  # shorter texts are too generic to call duplicates
+BANDS = 16
+ROWS = 4
+SIGNATURE_SIZE = BANDS * ROWS
+DUPLICATE_THRESHOLD = 0.7
+MAX_CANDIDATES = 100
+MINHASH_BLOCK = 250_000  # shingles hashed at once by minhash_many, ~128 MB per temporary
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+# Fixed seeds: stored signatures and bucket keys must be reproducible across processes
+_PRIME = (1 << 32) + 15
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, 1 << 32, SIGNATURE_SIZE, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, SIGNATURE_SIZE, dtype=np.uint64)
+_BAND_MULTIPLIERS = _rng.integers(1, 1 << 63, (BANDS, ROWS), dtype=np.uint64) | np.uint64(1)
+_BAND_SALTS = _rng.integers(0, 1 << 63, BANDS, dtype=np.uint64)
+
+
+def shingle_hashes(text):
+    """CRC32 hashes of the distinct word 3-grams of ``text``."""
+    words = WORD_RE.findall(text.lower())
+    return np.unique(np.fromiter(
+        (zlib.crc32(' '.join(words[index:index + SHINGLE_SIZE]).encode())
+         for index in range(len(words) - SHINGLE_SIZE + 1)),
+        dtype=np.uint64
+    ))
+
+
+def minhash(hashes):
+    """Signature of one shingle set: the minimum of each of the permutations."""
+    # a * x + b stays below 2**64 for 32-bit a, b and x
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def minhash_many(hash_sets):
+    """Signatures of many shingle sets at once, as an (n, SIGNATURE_SIZE) array."""
+    lengths = np.fromiter((len(hashes) for hashes in hash_sets), dtype=np.int64, count=len(hash_sets))
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    signatures = np.full((len(hash_sets), SIGNATURE_SIZE), np.iinfo(np.uint32).max, dtype=np.uint32)
+    block_start = 0
+    # Whole sets per block of about MINHASH_BLOCK shingles, each reduced with one reduceat
+    while block_start < len(hash_sets):
+        block_stop = max(block_start + 1, int(np.searchsorted(
+            ends, starts[block_start] + MINHASH_BLOCK, side='right'
+        )))
+        rows = np.flatnonzero(lengths[block_start:block_stop]) + block_start
+        if len(rows):
+            values = np.concatenate(hash_sets[block_start:block_stop])
+            permuted = (_A[:, None] * values[None, :] + _B[:, None]) % _PRIME
+            signatures[rows] = np.minimum.reduceat(permuted, starts[rows] - starts[block_start], axis=1).T
+        block_start = block_stop
+    return signatures
+
+
+def band_keys(signatures):
+    """LSH bucket keys, one per band, as signed 64-bit integers for the database."""
+    signatures = np.atleast_2d(signatures).astype(np.uint64)
+    bands = signatures.reshape(len(signatures), BANDS, ROWS)
+    keys = (bands * _BAND_MULTIPLIERS).sum(axis=2, dtype=np.uint64) + _BAND_SALTS
+    return keys.view(np.int64)
+
+
+def similarity(signature, others):
+    """Estimated Jaccard similarity between one signature and each of ``others``."""
+    return (np.atleast_2d(others) == signature).mean(axis=1)
+
+
+def index_review(review):
+    """
+    Fingerprint a newly created review and flag it when it nearly duplicates
+    an indexed review. Returns the fingerprint, or None for short texts.
+    """
+    hashes = shingle_hashes(f'{review.title} {review.comment}')
+    if len(hashes) < MIN_SHINGLES:
+        return None
+    signature = minhash(hashes)
+    keys = band_keys(signature)[0].tolist()
+
+    candidate_ids = list(
+        ReviewBucket.objects.filter(key__in=keys).exclude(review_id=review.pk)
+        .order_by().values_list('review_id', flat=True).distinct()[:MAX_CANDIDATES]
+    )
+    duplicate_of, best = None, None
+    if candidate_ids:
+        candidates = list(ReviewFingerprint.objects.filter(review_id__in=candidate_ids).values_list(
+            'review_id', 'signature', 'duplicate_of_id'
+        ))
+        scores = similarity(signature, np.array([
+            np.frombuffer(bytes(stored), dtype=np.uint32) for _, stored, _ in candidates
+        ]))
+        index = int(scores.argmax())
+        if scores[index] >= DUPLICATE_THRESHOLD:
+            candidate_id, _, root_id = candidates[index]
+            duplicate_of, best = root_id or candidate_id, float(scores[index])
+
+    with transaction.atomic():
+        fingerprint = ReviewFingerprint.objects.create(
+            review=review, signature=signature.tobytes(), duplicate_of_id=duplicate_of, similarity=best
+        )
+        ReviewBucket.objects.bulk_create([ReviewBucket(review=review, key=key) for key in keys])
+    return fingerprint
+
+
+def rebuild_duplicate_index(chunk_size=2000):
+    """Re-index every review, oldest first, so clusters are rooted at the earliest review. Returns reviews flagged."""
+    with transaction.atomic():
+        ReviewBucket.objects.all().delete()
+        ReviewFingerprint.objects.all().delete()
+    flagged = 0
+    for review in Review.objects.order_by('created_at', 'id').only('id', 'title', 'comment').iterator(chunk_size):
+        fingerprint = index_review(review)
+        flagged += bool(fingerprint and fingerprint.duplicate_of_id)
+    return flagged
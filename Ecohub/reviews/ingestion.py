@@ -0,0 +1,68 @@
+"""
+Asynchronous review ingestion.
+
+With REVIEW_ASYNC_INGESTION enabled, a validated review is stored as a
+PendingReview row and the request is answered with 202 Accepted; the
+``ingest_reviews`` worker then inserts pending reviews in batches with
+``bulk_create``. New reviews are unapproved, so they contribute nothing to
+product aggregates, user impact or review statistics and the per-row
+signals can be skipped; only the duplicate index has to be updated.
+
+The (user, product) constraint is applied at insert time: a pending review
+for a pair that already has a review, or a repeat within the queue, is
+dropped.
+"""
+from django.db import transaction
+
+from .duplicates import index_review
+from .models import PendingReview, Review
+
+INGEST_BATCH_SIZE = 1000
+INGEST_INTERVAL = 2  # seconds
+
+
+def queue_review(user, validated_data):
+    """Accept a validated ReviewCreateSerializer payload for a later insert."""
+    data = dict(validated_data)
+    product = data.pop('product')
+    data.pop('user', None)
+    return PendingReview.objects.create(user=user, product=product, data=data)
+
+
+def ingest_pending_reviews(batch_size=INGEST_BATCH_SIZE):
+    """Insert queued reviews. Returns ``(created, dropped)``."""
+    created = dropped = 0
+    while True:
+        with transaction.atomic():
+            # Concurrent workers skip each other's locked rows instead of inserting them twice
+            pending = list(
+                PendingReview.objects.select_for_update(skip_locked=True)
+                .order_by('id').values_list('id', 'user_id', 'product_id', 'data')[:batch_size]
+            )
+            if not pending:
+                break
+            existing = set(Review.objects.filter(
+                user_id__in={user_id for _, user_id, _, _ in pending},
+                product_id__in={product_id for _, _, product_id, _ in pending},
+            ).values_list('user_id', 'product_id'))
+            reviews = {}
+            for _, user_id, product_id, data in pending:
+                if (user_id, product_id) not in existing:
+                    reviews.setdefault((user_id, product_id), Review(user_id=user_id, product_id=product_id, **data))
+            # A review created synchronously since the check above is still kept out by the constraint
+            Review.objects.bulk_create(reviews.values(), ignore_conflicts=True)
+            PendingReview.objects.filter(pk__in=[pk for pk, _, _, _ in pending]).delete()
+
+        inserted = list(Review.objects.filter(
+            user_id__in={user_id for user_id, _ in reviews},
+            product_id__in={product_id for _, product_id in reviews},
+            fingerprint__isnull=True,
+        ).order_by('id').only('id', 'user_id', 'product_id', 'title', 'comment'))
+        inserted = [review for review in inserted if (review.user_id, review.product_id) in reviews]
+        for review in inserted:
+            index_review(review)
+        created += len(inserted)
+        dropped += len(pending) - len(inserted)
+        if len(pending) < batch_size:
+            break
+    return created, dropped
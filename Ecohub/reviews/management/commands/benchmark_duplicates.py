@@ -0,0 +1,144 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from reviews.duplicates import (
+    BANDS, DUPLICATE_THRESHOLD, MAX_CANDIDATES, band_keys, minhash_many, shingle_hashes, similarity,
+)
+
+VOCABULARY_SIZE = 20000
+CHUNK_SIZE = 50000
+HISTORY = 4 * CHUNK_SIZE  # reviews back a planted duplicate may copy
+
+
+class BandIndex:
+    """The ReviewBucket (key) index in memory: one sorted key array per band."""
+
+    def __init__(self, keys):
+        self.order = np.argsort(keys, axis=0, kind='stable')
+        self.keys = np.take_along_axis(keys, self.order, axis=0)
+
+    def candidates(self, keys, exclude):
+        found = []
+        for band in range(BANDS):
+            column = self.keys[:, band]
+            start, stop = np.searchsorted(column, keys[band], 'left'), np.searchsorted(column, keys[band], 'right')
+            found.append(self.order[start:stop, band])
+        found = np.unique(np.concatenate(found))
+        return found[found != exclude][:MAX_CANDIDATES]
+
+
+class Command(BaseCommand):
+    help = (
+        'Index synthetic reviews with MinHash LSH, planting near-duplicates, and compare '
+        'candidate lookups against comparing every signature'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reviews', type=int, default=1_000_000)
+        parser.add_argument('--duplicates', type=float, default=0.01, help='Share of reviews that copy another')
+        parser.add_argument('--queries', type=int, default=2000)
+        parser.add_argument('--brute-force-queries', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def texts(self, rng, count):
+        """Review-like texts: Zipf-distributed words, 20 to 80 of them, with planted near-duplicates."""
+        vocabulary = np.array([f'word{index}' for index in range(VOCABULARY_SIZE)])
+        weights = 1 / np.arange(1, VOCABULARY_SIZE + 1)
+        weights /= weights.sum()
+        originals = {}
+        for start in range(0, count, CHUNK_SIZE):
+            stop = min(start + CHUNK_SIZE, count)
+            lengths = rng.integers(20, 81, stop - start)
+            words = rng.choice(VOCABULARY_SIZE, lengths.sum(), p=weights)
+            chunk = np.split(words, np.cumsum(lengths)[:-1])
+            for offset in np.flatnonzero(rng.random(stop - start) < self.share):
+                if start + offset == 0:
+                    continue
+                # Copy one of the recent reviews, changing one or two words
+                original = int(rng.integers(max(0, start - HISTORY), start + offset))
+                source = originals[original] if original in originals else chunk[original - start]
+                copy = source.copy()
+                copy[rng.integers(0, len(copy), rng.integers(1, 3))] = rng.integers(0, VOCABULARY_SIZE)
+                chunk[offset] = copy
+                self.planted[start + offset] = original
+            originals.update(enumerate(chunk, start))
+            yield [' '.join(vocabulary[review]) for review in chunk]
+            # Only the recent past is copied, keeping memory bounded
+            for index in range(max(0, start - HISTORY), max(0, stop - HISTORY)):
+                originals.pop(index, None)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        count, self.share, self.planted = options['reviews'], options['duplicates'], {}
+
+        started = time.perf_counter()
+        shingles, signatures = [], []
+        for texts in self.texts(rng, count):
+            hashes = [shingle_hashes(text) for text in texts]
+            signatures.append(minhash_many(hashes))
+            shingles.extend(hashes)
+        signatures = np.concatenate(signatures)
+        keys = band_keys(signatures)
+        index = BandIndex(keys)
+        self.stdout.write(
+            f'Indexed {count:,} reviews ({len(self.planted):,} planted near-duplicates) '
+            f'in {time.perf_counter() - started:.1f} s'
+        )
+
+        # Queries: planted duplicates (should be found) and untouched reviews (should not)
+        planted = np.array(sorted(self.planted))
+        untouched = np.setdiff1d(rng.integers(0, count, options['queries']), planted)
+        queries = np.concatenate([rng.permutation(planted)[:options['queries']], untouched])
+
+        def lookup(review):
+            candidates = index.candidates(keys[review], exclude=review)
+            if not len(candidates):
+                return None, 0
+            scores = similarity(signatures[review], signatures[candidates])
+            best = int(scores.argmax())
+            return (int(candidates[best]) if scores[best] >= DUPLICATE_THRESHOLD else None), len(candidates)
+
+        started = time.perf_counter()
+        found = {}
+        candidate_counts = []
+        for review in queries:
+            found[int(review)], candidates = lookup(review)
+            candidate_counts.append(candidates)
+        lsh_elapsed = (time.perf_counter() - started) / len(queries)
+
+        def jaccard(first, second):
+            return len(np.intersect1d(shingles[first], shingles[second], assume_unique=True)) / len(
+                np.union1d(shingles[first], shingles[second])
+            )
+
+        similar = [
+            review for review in planted
+            if review in found and jaccard(review, self.planted[review]) >= DUPLICATE_THRESHOLD
+        ]
+        recalled = sum(found[review] is not None for review in similar)
+        flagged = [review for review in untouched if found[int(review)] is not None]
+        false_positives = sum(jaccard(review, found[int(review)]) < DUPLICATE_THRESHOLD for review in flagged)
+        self.stdout.write(
+            f'LSH lookup: {lsh_elapsed * 1000:.2f} ms per query, '
+            f'{np.mean(candidate_counts):.1f} candidates on average'
+        )
+        self.stdout.write(
+            f'Recall: {recalled} of {len(similar)} planted pairs with Jaccard >= {DUPLICATE_THRESHOLD} '
+            f'({recalled / max(len(similar), 1):.1%})'
+        )
+        self.stdout.write(
+            f'False positives: {false_positives} of {len(untouched)} untouched reviews flagged below the threshold'
+        )
+
+        started = time.perf_counter()
+        for review in queries[:options['brute_force_queries']]:
+            scores = similarity(signatures[review], signatures)
+            scores[review] = 0
+            scores.argmax()
+        brute_elapsed = (time.perf_counter() - started) / min(len(queries), options['brute_force_queries'])
+        self.stdout.write(
+            f'Comparing every signature: {brute_elapsed * 1000:.2f} ms per query '
+            f'({brute_elapsed / lsh_elapsed:,.0f}x slower)'
+        )
@@ -0,0 +1,98 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from reviews.models import Review
+from reviews.votes import flush_helpful_votes, record_helpful_vote
+
+User = get_user_model()
+VOTER_PREFIX = 'benchmark-voter-'
+
+
+def legacy_vote(review_id, user):
+    """What mark_helpful used to do: read, increment and save the whole row."""
+    review = Review.objects.get(pk=review_id)
+    review.helpful_votes += 1
+    review.save()
+
+
+def buffered_vote(review_id, user):
+    record_helpful_vote(Review(pk=review_id), user)
+
+
+class Command(BaseCommand):
+    help = (
+        'Vote on one review from many threads at once, comparing the old '
+        'read-modify-write save with buffered, deduplicated votes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--voters', type=int, default=400)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--review', type=int, help='Review to vote on; defaults to the first approved one')
+
+    def run(self, vote, review_id, voters, threads):
+        errors = []
+
+        def worker(chunk):
+            try:
+                for user in chunk:
+                    try:
+                        vote(review_id, user)
+                    except Exception as exc:
+                        errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(voters[index::threads],)) for index in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return time.perf_counter() - started, errors
+
+    def stored_votes(self, review_id):
+        return Review.objects.values_list('helpful_votes', flat=True).get(pk=review_id)
+
+    def handle(self, *args, **options):
+        review_id = options['review'] or Review.objects.filter(is_approved=True).order_by('id').values_list(
+            'id', flat=True
+        ).first()
+        if review_id is None:
+            raise CommandError('No approved review to vote on')
+        if User.objects.filter(username__startswith=VOTER_PREFIX).exists():
+            raise CommandError(f'Remove the users left over by an earlier run ({VOTER_PREFIX}*) first')
+
+        count, threads = options['voters'], options['threads']
+        User.objects.bulk_create([User(username=f'{VOTER_PREFIX}{index}') for index in range(count)])
+        voters = list(User.objects.filter(username__startswith=VOTER_PREFIX))
+        original = self.stored_votes(review_id)
+        flush_helpful_votes()
+        try:
+            elapsed, errors = self.run(legacy_vote, review_id, voters, threads)
+            applied = self.stored_votes(review_id) - original
+            self.stdout.write(
+                f'read-modify-write save: {count / elapsed:,.0f} votes/s, '
+                f'{applied} of {count} votes counted, {len(errors)} errors'
+            )
+            Review.objects.filter(pk=review_id).update(helpful_votes=original)
+
+            elapsed, errors = self.run(buffered_vote, review_id, voters, threads)
+            flush_helpful_votes()
+            applied = self.stored_votes(review_id) - original
+            self.stdout.write(
+                f'buffered votes: {count / elapsed:,.0f} votes/s, '
+                f'{applied} of {count} votes counted, {len(errors)} errors'
+            )
+
+            self.run(buffered_vote, review_id, voters, threads)
+            flush_helpful_votes()
+            duplicates = self.stored_votes(review_id) - original - applied
+            self.stdout.write(f'second round from the same voters: {duplicates} duplicate votes counted')
+        finally:
+            User.objects.filter(username__startswith=VOTER_PREFIX).delete()
+            Review.objects.filter(pk=review_id).update(helpful_votes=original)
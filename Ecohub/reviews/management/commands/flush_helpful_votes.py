@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.votes import FLUSH_BATCH_SIZE, FLUSH_INTERVAL, flush_helpful_votes
+
+
+class Command(BaseCommand):
+    help = 'Fold buffered helpful votes into Review.helpful_votes, once or continuously'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=FLUSH_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Keep flushing every --interval seconds')
+        parser.add_argument('--interval', type=float, default=FLUSH_INTERVAL)
+
+    def handle(self, *args, **options):
+        while True:
+            counted = flush_helpful_votes(batch_size=options['batch_size'])
+            if counted or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Counted {counted} helpful votes'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.ingestion import INGEST_BATCH_SIZE, INGEST_INTERVAL, ingest_pending_reviews
+
+
+class Command(BaseCommand):
+    help = 'Insert reviews queued in asynchronous ingestion mode, once or continuously'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=INGEST_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Keep ingesting every --interval seconds')
+        parser.add_argument('--interval', type=float, default=INGEST_INTERVAL)
+
+    def handle(self, *args, **options):
+        while True:
+            created, dropped = ingest_pending_reviews(batch_size=options['batch_size'])
+            if created or dropped or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Created {created} reviews, dropped {dropped} duplicates'
+                ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
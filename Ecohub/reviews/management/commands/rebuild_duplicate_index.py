@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from reviews.duplicates import rebuild_duplicate_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the MinHash index used to flag near-duplicate reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        flagged = rebuild_duplicate_index(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt the duplicate index, {flagged} reviews flagged as near-duplicates'
+        ))
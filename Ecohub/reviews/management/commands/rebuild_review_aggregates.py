@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from reviews.aggregates import rebuild_product_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized review aggregates stored on products'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--product', type=int, action='append', dest='product_ids',
+            help='Only rebuild the given product id (may be repeated)'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_product_aggregates(
+            product_ids=options['product_ids'],
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt review aggregates for {rebuilt} reviewed products'
+        ))
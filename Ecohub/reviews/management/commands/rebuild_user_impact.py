@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from reviews.portfolio import rebuild_user_impact
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-user impact rollups behind portfolios and the leaderboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='Only rebuild the given user id (may be repeated)'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_user_impact(
+            user_ids=options['user_ids'],
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt impact rollups for {rebuilt} users'
+        ))
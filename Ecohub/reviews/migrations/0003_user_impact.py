@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('reviews', '0002_review_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserImpact',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='impact', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('verified_product_count', models.PositiveIntegerField(default=0)),
+                ('reported_product_count', models.PositiveIntegerField(default=0)),
+                ('monthly_energy_savings', models.FloatField(default=0.0, help_text='kWh saved per month')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-monthly_energy_savings', 'user'], name='impact_leaderboard')],
+            },
+        ),
+    ]
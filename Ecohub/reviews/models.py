@@ -35,10 +35,84 @@ class Review(models.Model):
     class Meta:
         unique_together = ('user', 'product')  # One review per user per product
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['product', 'is_approved', '-created_at'], name='review_product_approved_new'),
+            models.Index(fields=['product', 'is_approved', '-helpful_votes'], name='review_product_helpful'),
+            models.Index(fields=['is_approved', '-created_at'], name='review_approved_newest'),
+        ]
 
     def __str__(self):
         return f"Review by {self.user.username} for {self.product.name}"
 
     @property
     def average_rating(self):
-        return (self.overall_rating + self.eco_impact_rating + self.value_for_money + self.build_quality) / 4
\ No newline at end of file
+        return (self.overall_rating + self.eco_impact_rating + self.value_for_money + self.build_quality) / 4
+
+
+class HelpfulVote(models.Model):
+    """One user's helpful vote; uncounted votes are the write-behind buffer of Review.helpful_votes."""
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='votes')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='helpful_votes')
+    counted = models.BooleanField(default=False)  # Already folded into Review.helpful_votes
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('review', 'user')  # One vote per user per review
+        indexes = [
+            models.Index(fields=['counted', 'review'], name='helpful_vote_uncounted'),
+        ]
+
+    def __str__(self):
+        return f"Helpful vote by {self.user.username} on review {self.review_id}"
+
+
+class PendingReview(models.Model):
+    """A validated review accepted in asynchronous mode, waiting for reviews.ingestion to insert it."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    data = models.JSONField()  # The remaining ReviewCreateSerializer fields
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Pending review by user {self.user_id} for product {self.product_id}"
+
+
+class ReviewFingerprint(models.Model):
+    """MinHash signature of a review's text, written by reviews.duplicates when the review is created."""
+    review = models.OneToOneField(Review, on_delete=models.CASCADE, primary_key=True, related_name='fingerprint')
+    signature = models.BinaryField()
+    # Earliest review of the near-duplicate cluster this review joined, if any
+    duplicate_of = models.ForeignKey(Review, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    similarity = models.FloatField(null=True, blank=True)  # Estimated Jaccard similarity of the closest match
+
+    def __str__(self):
+        return f"Fingerprint of review {self.review_id}"
+
+
+class ReviewBucket(models.Model):
+    """One LSH band of a review's signature; reviews sharing a key are near-duplicate candidates."""
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='+')
+    key = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['key'], name='review_bucket_key'),
+        ]
+
+
+class UserImpact(models.Model):
+    """Rollup of a user's approved reviews, maintained incrementally by reviews.portfolio."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='impact')
+    product_count = models.PositiveIntegerField(default=0)
+    verified_product_count = models.PositiveIntegerField(default=0)
+    reported_product_count = models.PositiveIntegerField(default=0)  # Reviews reporting actual savings
+    monthly_energy_savings = models.FloatField(default=0.0, help_text="kWh saved per month")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-monthly_energy_savings', 'user'], name='impact_leaderboard'),
+        ]
+
+    def __str__(self):
+        return f"Impact of {self.user.username}"
@@ -0,0 +1,71 @@
+"""
+Bulk review moderation.
+
+Approving or verifying a batch of reviews is one UPDATE, and rejecting one
+is a queryset DELETE run under ``bulk_review_changes`` so that its
+per-row delete signals do nothing. Instead, the product aggregates and
+user impact rollups of every affected product and user are rebuilt once
+per batch, and caches are invalidated once, after commit.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from products.models import Product
+
+from .aggregates import invalidate_review_statistics, rebuild_product_aggregates
+from .models import Review
+from .portfolio import rebuild_user_impact
+from .signals import bulk_review_changes
+
+ACTIONS = ('approve', 'reject', 'verify')
+MAX_BATCH_SIZE = 10000
+
+
+def moderation_queue(flagged=False):
+    """
+    Reviews waiting for approval, oldest first, on the (is_approved, created_at)
+    index. ``flagged`` keeps only near-duplicates of another review.
+    """
+    queue = Review.objects.filter(is_approved=False)
+    if flagged:
+        queue = queue.filter(fingerprint__duplicate_of__isnull=False)
+    return queue.select_related('user', 'product', 'fingerprint').order_by('created_at')
+
+
+def moderate_reviews(action, review_ids):
+    """
+    Approve, reject (delete) or mark as verified purchases the given reviews.
+
+    Returns ``{'action', 'updated'}`` with the number of reviews whose state
+    changed; unknown ids and reviews already in the target state are skipped.
+    """
+    reviews = Review.objects.filter(pk__in=review_ids)
+    if action == 'approve':
+        reviews = reviews.filter(is_approved=False)
+    elif action == 'verify':
+        reviews = reviews.filter(is_verified_purchase=False)
+    affected = list(reviews.values_list('id', 'product_id', 'user_id'))
+    if not affected:
+        return {'action': action, 'updated': 0}
+
+    ids = [review_id for review_id, _, _ in affected]
+    product_ids = {product_id for _, product_id, _ in affected}
+    user_ids = {user_id for _, _, user_id in affected}
+    now = timezone.now()
+    with transaction.atomic():
+        if action == 'approve':
+            Review.objects.filter(pk__in=ids).update(is_approved=True, updated_at=now)
+        elif action == 'verify':
+            Review.objects.filter(pk__in=ids).update(is_verified_purchase=True, updated_at=now)
+        else:
+            with bulk_review_changes():
+                Review.objects.filter(pk__in=ids).delete()
+
+        if action != 'verify':
+            rebuild_product_aggregates(product_ids)
+            # The ratings are part of the product's representation
+            Product.objects.filter(pk__in=product_ids).update(updated_at=now)
+        rebuild_user_impact(user_ids)
+        if action != 'verify':
+            invalidate_review_statistics(*product_ids)
+    return {'action': action, 'updated': len(ids)}
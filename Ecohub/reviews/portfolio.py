@@ -0,0 +1,131 @@
+"""
+Per-user impact portfolios built from reviews.
+
+A user's portfolio covers the products they reviewed (verified purchases
+count as owned) with the energy savings they reported. Totals live in one
+UserImpact row per user, moved by ``apply_impact_change`` with ``F()``
+updates on every review write, so neither the portfolio nor the
+leaderboard ever scans review history. A missing row is built from the
+user's reviews the first time they contribute.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from products.impact import CO2_LBS_PER_KWH, KG_PER_LB
+
+from .models import Review, UserImpact
+
+CO2_KG_PER_KWH = CO2_LBS_PER_KWH * KG_PER_LB
+LEADERBOARD_SIZE = 20
+MAX_LEADERBOARD_SIZE = 100
+ROLLUP_FIELDS = ['product_count', 'verified_product_count', 'reported_product_count', 'monthly_energy_savings']
+
+
+def impact_contribution(review):
+    """Return (user_id, {rollup_field: value}) for a review, or None."""
+    if review is None or not review.is_approved:
+        return None
+    savings = review.actual_energy_savings
+    return review.user_id, {
+        'product_count': 1,
+        'verified_product_count': int(review.is_verified_purchase),
+        'reported_product_count': int(savings is not None),
+        'monthly_energy_savings': savings or 0,
+    }
+
+
+def apply_impact_change(old, new):
+    """Move the owners' rollups from an old review contribution to a new one."""
+    deltas = {}
+    for contribution, sign in ((old, -1), (new, 1)):
+        if contribution is None:
+            continue
+        user_id, values = contribution
+        user_deltas = deltas.setdefault(user_id, {})
+        for field, value in values.items():
+            user_deltas[field] = user_deltas.get(field, 0) + sign * value
+
+    for user_id, user_deltas in deltas.items():
+        updates = {field: F(field) + delta for field, delta in user_deltas.items() if delta}
+        if not updates or UserImpact.objects.filter(user_id=user_id).update(**updates):
+            continue
+        # No rollup yet: build it from the (already saved) reviews. Never on
+        # removals alone, which happen while a deleted user's rows cascade.
+        if new is not None and new[0] == user_id:
+            rebuild_user_impact([user_id])
+
+
+def rebuild_user_impact(user_ids=None, batch_size=500):
+    """
+    Recompute rollups from the reviews table, for every user or only the
+    given ones. Returns the number of users with approved reviews.
+    """
+    rollups = UserImpact.objects.all()
+    reviews = Review.objects.filter(is_approved=True)
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        rollups = rollups.filter(user_id__in=user_ids)
+        reviews = reviews.filter(user_id__in=user_ids)
+
+    rows = reviews.order_by().values('user_id').annotate(
+        product_count=Count('id'),
+        verified_product_count=Count('id', filter=Q(is_verified_purchase=True)),
+        reported_product_count=Count('actual_energy_savings'),
+        monthly_energy_savings=Sum('actual_energy_savings', default=0.0),
+    )
+    rebuilt = 0
+    with transaction.atomic():
+        rollups.delete()
+        batch = []
+        for row in rows.iterator():
+            batch.append(UserImpact(**row))
+            if len(batch) >= batch_size:
+                UserImpact.objects.bulk_create(batch, ignore_conflicts=True)
+                rebuilt += len(batch)
+                batch = []
+        UserImpact.objects.bulk_create(batch, ignore_conflicts=True)
+        rebuilt += len(batch)
+    return rebuilt
+
+
+def _savings(monthly_energy_savings):
+    annual = monthly_energy_savings * 12
+    return {
+        'monthly_energy_savings': monthly_energy_savings,
+        'annual_energy_savings': annual,
+        'annual_co2_savings_kg': annual * CO2_KG_PER_KWH,
+    }
+
+
+def impact_portfolio(user):
+    """
+    The user's rollup with annual savings and progress towards
+    ``carbon_footprint_target``, read as kg of CO2 to save per year.
+    """
+    rollup = UserImpact.objects.filter(user=user).first() or UserImpact(user=user)
+    portfolio = {field: getattr(rollup, field) for field in ROLLUP_FIELDS}
+    portfolio.update(_savings(rollup.monthly_energy_savings))
+    target = user.carbon_footprint_target
+    portfolio['carbon_footprint_target'] = target
+    portfolio['target_progress'] = portfolio['annual_co2_savings_kg'] / target if target else None
+    portfolio['leaderboard_rank'] = (
+        UserImpact.objects.filter(monthly_energy_savings__gt=rollup.monthly_energy_savings).count() + 1
+        if rollup.monthly_energy_savings > 0 else None
+    )
+    return portfolio
+
+
+def leaderboard(limit=LEADERBOARD_SIZE):
+    """Users with the highest reported savings, read from the rollups alone."""
+    rows = UserImpact.objects.filter(monthly_energy_savings__gt=0).order_by(
+        '-monthly_energy_savings', 'user_id'
+    ).values('user__username', *ROLLUP_FIELDS)[:limit]
+    return [
+        {
+            'rank': rank,
+            'username': row['user__username'],
+            **{field: row[field] for field in ROLLUP_FIELDS if field != 'monthly_energy_savings'},
+            **_savings(row['monthly_energy_savings']),
+        }
+        for rank, row in enumerate(rows, 1)
+    ]
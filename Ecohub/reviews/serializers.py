@@ -1,5 +1,9 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from .duplicates import index_review
 from .models import Review
+from .moderation import ACTIONS, MAX_BATCH_SIZE
 from accounts.serializers import UserProfileSerializer
 
 
@@ -73,18 +77,39 @@ class ReviewCreateSerializer(serializers.ModelSerializer):
             'would_recommend'
         ]
 
-    def validate(self, attrs):
-        """Check if user has already reviewed this product"""
-        user = self.context['request'].user
-        product = attrs.get('product')
-
-        if Review.objects.filter(user=user, product=product).exists():
-            raise serializers.ValidationError(
-                "You have already reviewed this product."
-            )
-
-        return attrs
-
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data)
+        # The (user, product) unique constraint rejects a second review; the
+        # savepoint keeps an enclosing transaction usable when it does
+        try:
+            with transaction.atomic():
+                review = super().create(validated_data)
+        except IntegrityError:
+            # Only a conflict pays for this query; other violations (say, a
+            # product deleted since validation) are not duplicates
+            if not Review.objects.filter(
+                user=validated_data['user'], product=validated_data['product']
+            ).exists():
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: ["You have already reviewed this product."]
+            })
+        index_review(review)
+        return review
+
+
+class ModerationReviewSerializer(ReviewSerializer):
+    """A review in the moderation queue, with the review it nearly duplicates"""
+    duplicate_of = serializers.IntegerField(source='fingerprint.duplicate_of_id', read_only=True)
+    similarity = serializers.FloatField(source='fingerprint.similarity', read_only=True)
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ['duplicate_of', 'similarity']
+
+
+class ReviewModerationSerializer(serializers.Serializer):
+    """A bulk moderation request"""
+    action = serializers.ChoiceField(choices=ACTIONS)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_BATCH_SIZE
+    )
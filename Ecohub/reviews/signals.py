@@ -0,0 +1,81 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .aggregates import (
+    apply_review_change, invalidate_featured, invalidate_review_statistics, review_contribution,
+)
+from .models import Review
+from .portfolio import apply_impact_change, impact_contribution
+
+_bulk = threading.local()
+
+
+@contextmanager
+def bulk_review_changes():
+    """
+    Skip the per-review signal work inside the block. For bulk writers that
+    rebuild aggregates and invalidate caches once for the whole batch.
+    """
+    _bulk.active = True
+    try:
+        yield
+    finally:
+        _bulk.active = False
+
+
+def _in_bulk():
+    return getattr(_bulk, 'active', False)
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_contribution(sender, instance, raw=False, **kwargs):
+    """Snapshot the stored review so post_save can apply only the difference."""
+    if raw or _in_bulk() or instance.pk is None:
+        instance._previous_contribution = instance._previous_impact = None
+        return
+    previous = Review.objects.filter(pk=instance.pk).only(
+        'product_id', 'user_id', 'is_approved', 'overall_rating', 'eco_impact_rating',
+        'value_for_money', 'build_quality', 'is_verified_purchase', 'actual_energy_savings'
+    ).first()
+    instance._previous_contribution = review_contribution(previous)
+    instance._previous_impact = impact_contribution(previous)
+
+
+@receiver(post_save, sender=Review)
+def update_product_aggregates_on_save(sender, instance, raw=False, **kwargs):
+    if raw or _in_bulk():
+        return
+    previous = getattr(instance, '_previous_contribution', None)
+    if apply_review_change(previous, review_contribution(instance)):
+        transaction.on_commit(invalidate_featured)
+    # Statistics also cover fields outside the aggregates, such as would_recommend
+    invalidate_review_statistics(instance.product_id, *([previous[0]] if previous else []))
+    instance._previous_contribution = review_contribution(instance)
+
+
+@receiver(post_save, sender=Review)
+def update_user_impact_on_save(sender, instance, raw=False, **kwargs):
+    if raw or _in_bulk():
+        return
+    apply_impact_change(getattr(instance, '_previous_impact', None), impact_contribution(instance))
+    instance._previous_impact = impact_contribution(instance)
+
+
+@receiver(post_delete, sender=Review)
+def update_product_aggregates_on_delete(sender, instance, **kwargs):
+    if _in_bulk():
+        return
+    if apply_review_change(review_contribution(instance), None):
+        transaction.on_commit(invalidate_featured)
+    invalidate_review_statistics(instance.product_id)
+
+
+@receiver(post_delete, sender=Review)
+def update_user_impact_on_delete(sender, instance, **kwargs):
+    if _in_bulk():
+        return
+    apply_impact_change(impact_contribution(instance), None)
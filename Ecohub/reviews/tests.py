@@ -1,3 +1,241 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.db.models import Avg, Count, Sum
+from django.test import TestCase, override_settings
+from rest_framework import serializers
+from rest_framework.test import APIClient, APIRequestFactory
+
+from products.models import Category, Product
+from vendors.models import Vendor
+
+from .aggregates import RATING_FIELDS, rebuild_product_aggregates
+from .ingestion import ingest_pending_reviews
+from .models import HelpfulVote, PendingReview, Review
+from .moderation import moderate_reviews
+from .serializers import ReviewCreateSerializer
+from .votes import REQUEST_FLUSH_BATCH_SIZE, flush_helpful_votes, record_helpful_vote
+
+User = get_user_model()
+
+
+def create_product(name='Solar Charger', **fields):
+    vendor_user = User.objects.create_user(f'vendor-{name}', user_type='vendor')
+    vendor = Vendor.objects.create(
+        user=vendor_user, company_name=f'{name} Co', business_license='L-1', tax_id='T-1',
+        business_address='1 Green St', contact_phone='555', description='Vendor'
+    )
+    category, _ = Category.objects.get_or_create(name='Energy', defaults={'description': 'Energy'})
+    return Product.objects.create(
+        name=name, description='Product', category=category, vendor=vendor, price=10,
+        energy_efficiency_rating='A', carbon_footprint=1, energy_consumption=1,
+        slug=name.lower().replace(' ', '-'), **fields
+    )
+
+
+def review_payload(product, **fields):
+    payload = {
+        'product': product.pk, 'overall_rating': 4, 'eco_impact_rating': 5,
+        'value_for_money': 3, 'build_quality': 4,
+        'title': 'Works well', 'comment': 'Charges my phone even on cloudy days',
+    }
+    payload.update(fields)
+    return payload
+
+
+def create_review(product, user, **fields):
+    values = {
+        'overall_rating': 4, 'eco_impact_rating': 5, 'value_for_money': 3, 'build_quality': 4,
+        'title': 'Review', 'comment': f'Review by {user.username}',
+    }
+    values.update(fields)
+    return Review.objects.create(product=product, user=user, **values)
+
+
+class ReviewAggregateTests(TestCase):
+    """Product review aggregates stay equal to a fresh aggregate over approved reviews."""
+
+    def setUp(self):
+        cache.clear()
+        self.product = create_product()
+        self.other_product = create_product('Bamboo Toothbrush')
+        self.users = [User.objects.create_user(f'user{index}') for index in range(4)]
+
+    def assertAggregatesMatch(self, *products):
+        for product in products or (self.product, self.other_product):
+            product.refresh_from_db()
+            expected = Review.objects.filter(product=product, is_approved=True).aggregate(
+                review_count=Count('id'), average=Avg('overall_rating'),
+                **{sum_field: Sum(rating_field) for rating_field, sum_field in RATING_FIELDS.items()}
+            )
+            self.assertEqual(product.review_count, expected['review_count'])
+            for sum_field in RATING_FIELDS.values():
+                self.assertEqual(getattr(product, sum_field), expected[sum_field] or 0)
+            self.assertEqual(product.average_rating, round(expected['average'], 1) if expected['average'] else 0.0)
+
+    def test_unapproved_reviews_are_not_counted(self):
+        create_review(self.product, self.users[0])
+        self.assertAggregatesMatch()
+        self.assertEqual(self.product.review_count, 0)
+
+    def test_create_approved(self):
+        create_review(self.product, self.users[0], is_approved=True, overall_rating=5)
+        create_review(self.product, self.users[1], is_approved=True, overall_rating=2)
+        self.assertAggregatesMatch()
+        self.assertEqual(self.product.review_count, 2)
+        self.assertEqual(self.product.average_rating, 3.5)
+
+    def test_approve_and_unapprove(self):
+        review = create_review(self.product, self.users[0], overall_rating=3)
+        create_review(self.product, self.users[1], is_approved=True, overall_rating=5)
+        review.is_approved = True
+        review.save()
+        self.assertAggregatesMatch()
+        self.assertEqual(self.product.review_count, 2)
+
+        review.is_approved = False
+        review.save()
+        self.assertAggregatesMatch()
+        self.assertEqual(self.product.review_count, 1)
+
+    def test_rating_edit(self):
+        review = create_review(self.product, self.users[0], is_approved=True, overall_rating=1)
+        review.overall_rating = 5
+        review.build_quality = 2
+        review.save()
+        self.assertAggregatesMatch()
+        self.assertEqual(self.product.average_rating, 5.0)
+
+    def test_moving_a_review_to_another_product(self):
+        review = create_review(self.product, self.users[0], is_approved=True)
+        review.product = self.other_product
+        review.save()
+        self.assertAggregatesMatch()
+        self.assertEqual((self.product.review_count, self.other_product.review_count), (0, 1))
+
+    def test_delete(self):
+        create_review(self.product, self.users[0], is_approved=True, overall_rating=4)
+        review = create_review(self.product, self.users[1], is_approved=True, overall_rating=2)
+        review.delete()
+        self.assertAggregatesMatch()
+        self.assertEqual(self.product.review_count, 1)
+
+        self.product.reviews.all().delete()
+        self.assertAggregatesMatch()
+        self.assertEqual(self.product.average_rating, 0.0)
+
+    def test_bulk_moderation(self):
+        reviews = [
+            create_review(product, user, overall_rating=rating)
+            for product, user, rating in [
+                (self.product, self.users[0], 5), (self.product, self.users[1], 1),
+                (self.product, self.users[2], 3), (self.other_product, self.users[0], 4),
+            ]
+        ]
+        ids = [review.pk for review in reviews]
+        self.assertEqual(moderate_reviews('approve', ids)['updated'], 4)
+        self.assertAggregatesMatch()
+        self.assertEqual(self.product.review_count, 3)
+
+        moderate_reviews('verify', ids[:2])
+        self.assertAggregatesMatch()
+
+        self.assertEqual(moderate_reviews('reject', ids[1:])['updated'], 3)
+        self.assertAggregatesMatch()
+        self.assertEqual((self.product.review_count, self.other_product.review_count), (1, 0))
+
+    def test_bulk_reject_invalidates_caches_once_after_commit(self):
+        ids = [
+            create_review(self.product, user, is_approved=True).pk for user in self.users[:3]
+        ] + [create_review(self.other_product, self.users[0], is_approved=True).pk]
+        with mock.patch('products.cache.invalidate') as invalidate, \
+                self.captureOnCommitCallbacks(execute=True):
+            moderate_reviews('reject', ids)
+            invalidate.assert_not_called()
+        namespaces = [namespace for call in invalidate.call_args_list for namespace in call.args]
+        self.assertEqual(sorted(namespaces), sorted([
+            'featured', f'review-stats:{self.product.pk}', f'review-stats:{self.other_product.pk}',
+        ]))
+        self.assertAggregatesMatch()
+
+    def test_rebuild_matches_incremental_updates(self):
+        create_review(self.product, self.users[0], is_approved=True, overall_rating=5)
+        create_review(self.product, self.users[1], is_approved=True, overall_rating=2)
+        create_review(self.other_product, self.users[0], overall_rating=2)
+        Product.objects.update(review_count=0, overall_rating_sum=7)
+        rebuild_product_aggregates()
+        self.assertAggregatesMatch()
+
+
+class ReviewCreateTests(TestCase):
+    def setUp(self):
+        cache.clear()  # Throttle counters
+        self.product = create_product()
+        self.user = User.objects.create_user('reviewer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_second_review_of_a_product_is_rejected(self):
+        response = self.client.post('/api/reviews/api/', review_payload(self.product), format='json')
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post('/api/reviews/api/', review_payload(self.product), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'non_field_errors': ['You have already reviewed this product.']})
+        self.assertEqual(Review.objects.filter(user=self.user).count(), 1)
+
+    def test_other_integrity_errors_are_not_reported_as_duplicates(self):
+        request = APIRequestFactory().post('/api/reviews/api/')
+        request.user = self.user
+        serializer = ReviewCreateSerializer(data=review_payload(self.product), context={'request': request})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with mock.patch.object(serializers.ModelSerializer, 'create', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                serializer.save()
+
+    @override_settings(REVIEW_ASYNC_INGESTION=True)
+    def test_async_mode_queues_reviews_for_the_worker(self):
+        response = self.client.post('/api/reviews/api/', review_payload(self.product), format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(PendingReview.objects.count(), 1)
+        self.assertFalse(Review.objects.exists())
+
+        # A repeat is accepted too, and dropped when the queue is ingested
+        self.client.post('/api/reviews/api/', review_payload(self.product), format='json')
+        self.assertEqual(ingest_pending_reviews(), (1, 1))
+        self.assertFalse(PendingReview.objects.exists())
+        review = Review.objects.get(user=self.user, product=self.product)
+        self.assertEqual(review.comment, 'Charges my phone even on cloudy days')
+        self.assertFalse(review.is_approved)
+
+    @override_settings(REVIEW_ASYNC_INGESTION=True)
+    def test_async_mode_still_validates(self):
+        response = self.client.post('/api/reviews/api/', {'product': self.product.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PendingReview.objects.exists())
+
+
+class HelpfulVoteTests(TestCase):
+    def setUp(self):
+        cache.clear()  # The flush lock
+        self.review = create_review(create_product(), User.objects.create_user('author'), is_approved=True)
+
+    def test_votes_count_once_per_user(self):
+        voter = User.objects.create_user('voter')
+        self.assertEqual(record_helpful_vote(self.review, voter), (True, 1))
+        self.assertEqual(record_helpful_vote(self.review, voter), (False, 1))
+
+    def test_request_flushes_at_most_one_bounded_batch(self):
+        voters = User.objects.bulk_create([User(username=f'voter{index}') for index in range(250)])
+        HelpfulVote.objects.bulk_create([HelpfulVote(review=self.review, user=voter) for voter in voters])
+
+        created, count = record_helpful_vote(self.review, User.objects.create_user('last-voter'))
+        self.assertEqual((created, count), (True, 251))
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.helpful_votes, REQUEST_FLUSH_BATCH_SIZE)
+
+        self.assertEqual(flush_helpful_votes(), 251 - REQUEST_FLUSH_BATCH_SIZE)
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.helpful_votes, 251)
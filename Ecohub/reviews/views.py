@@ -1,14 +1,23 @@
+from django.conf import settings
 from django.shortcuts import get_object_or_404
-from django.db import models
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from .aggregates import review_statistics
+from .ingestion import queue_review
 from .models import Review
+from .moderation import moderate_reviews, moderation_queue
+from .portfolio import LEADERBOARD_SIZE, MAX_LEADERBOARD_SIZE, impact_portfolio, leaderboard
+from .votes import record_helpful_vote
 from products.models import Product
+from api.conditional import ConditionalGetMixin
+from api.pagination import KeysetPagination, PageOrKeysetPagination
 from .serializers import (
     ReviewSerializer,
     ReviewListSerializer,
-    ReviewCreateSerializer
+    ReviewCreateSerializer,
+    ModerationReviewSerializer,
+    ReviewModerationSerializer
 )
 
 
@@ -22,12 +31,14 @@ class IsReviewOwner(permissions.BasePermission):
         return obj.user == request.user
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for review CRUD operations.
     """
     queryset = Review.objects.filter(is_approved=True)
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsReviewOwner]
+    pagination_class = PageOrKeysetPagination
+    conditional_fields = ('updated_at', 'user__updated_at', 'product__updated_at')
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -61,6 +72,17 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def create(self, request, *args, **kwargs):
+        if not settings.REVIEW_ASYNC_INGESTION:
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        queue_review(request.user, serializer.validated_data)
+        return Response(
+            {'message': 'Review accepted and will be published after moderation'},
+            status=status.HTTP_202_ACCEPTED
+        )
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -71,17 +93,48 @@ class ReviewViewSet(viewsets.ModelViewSet):
         serializer = ReviewListSerializer(reviews, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def my_impact(self, request):
+        """Energy and CO2 savings across the current user's reviewed products."""
+        return Response(impact_portfolio(request.user))
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
+    def leaderboard(self, request):
+        """Users with the highest reported energy savings."""
+        try:
+            limit = min(int(request.query_params.get('limit', LEADERBOARD_SIZE)), MAX_LEADERBOARD_SIZE)
+        except ValueError:
+            return Response({"error": "limit must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(leaderboard(max(limit, 1)))
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def mark_helpful(self, request, pk=None):
-        """Mark a review as helpful."""
+        """Mark a review as helpful, once per user."""
         review = self.get_object()
-        review.helpful_votes += 1
-        review.save()
+        created, helpful_votes = record_helpful_vote(review, request.user)
         return Response({
-            'message': 'Review marked as helpful',
-            'helpful_votes': review.helpful_votes
+            'message': 'Review marked as helpful' if created else 'You already marked this review as helpful',
+            'helpful_votes': helpful_votes
         })
 
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def moderation(self, request):
+        """
+        Reviews awaiting approval, oldest first (admin only). ``?flagged=true``
+        lists only near-duplicates, each with the review it repeats.
+        """
+        flagged = request.query_params.get('flagged', '').lower() in ('true', '1')
+        page = self.paginate_queryset(moderation_queue(flagged=flagged))
+        serializer = ModerationReviewSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def moderate(self, request):
+        """Approve, reject or verify many reviews at once (admin only)."""
+        serializer = ReviewModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(moderate_reviews(serializer.validated_data['action'], serializer.validated_data['ids']))
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def approve(self, request, pk=None):
         """Approve a review (admin only)."""
@@ -101,43 +154,30 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
 class ProductReviewsView(generics.ListAPIView):
     """
-    View to get all reviews for a specific product.
+    Statistics and a keyset-paginated page of a product's approved reviews.
     """
     serializer_class = ReviewListSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         product_id = self.kwargs.get('product_id')
         return Review.objects.filter(
             product_id=product_id,
             is_approved=True
-        ).order_by('-created_at')
+        ).select_related('user').order_by('-created_at')
 
     def get(self, request, *args, **kwargs):
-        product_id = self.kwargs.get('product_id')
-        product = get_object_or_404(Product, pk=product_id)
-
-        reviews = self.get_queryset()
-        serializer = self.get_serializer(reviews, many=True)
+        product = get_object_or_404(Product.objects.only('id', 'name'), pk=self.kwargs.get('product_id'))
 
-        # Calculate aggregate statistics
-        if reviews.exists():
-            avg_overall = reviews.aggregate(models.Avg('overall_rating'))['overall_rating__avg']
-            avg_eco = reviews.aggregate(models.Avg('eco_impact_rating'))['eco_impact_rating__avg']
-            avg_value = reviews.aggregate(models.Avg('value_for_money'))['value_for_money__avg']
-            avg_quality = reviews.aggregate(models.Avg('build_quality'))['build_quality__avg']
-        else:
-            avg_overall = avg_eco = avg_value = avg_quality = 0
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
 
         return Response({
             'product_id': product.id,
             'product_name': product.name,
-            'total_reviews': reviews.count(),
-            'average_ratings': {
-                'overall': round(avg_overall, 2) if avg_overall else 0,
-                'eco_impact': round(avg_eco, 2) if avg_eco else 0,
-                'value_for_money': round(avg_value, 2) if avg_value else 0,
-                'build_quality': round(avg_quality, 2) if avg_quality else 0,
-            },
+            **review_statistics(product.id),
+            'next': self.paginator.get_next_link(),
+            'previous': self.paginator.get_previous_link(),
             'reviews': serializer.data
         })
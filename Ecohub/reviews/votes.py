@@ -0,0 +1,80 @@
+"""
+Helpful votes, deduplicated per user and counted write-behind.
+
+A vote is a single HelpfulVote insert; the (review, user) unique
+constraint rejects repeats without a pre-check, and concurrent voters never
+contend for the review row. Uncounted vote rows are the buffer:
+``flush_helpful_votes`` folds them into Review.helpful_votes with one
+``F()`` update per distinct increment, touching updated_at (and so the
+review ETags) once per flush rather than once per vote. At most every
+FLUSH_INTERVAL seconds, the voting path folds one batch of at most
+REQUEST_FLUSH_BATCH_SIZE votes, so a request never pays for a backlog.
+The flush_helpful_votes command (``--loop`` as a worker) drains the rest.
+The stored counter, and with it ``-helpful_votes`` ordering, therefore
+lags by a bounded delay.
+"""
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import HelpfulVote, Review
+
+FLUSH_INTERVAL = 5  # seconds
+FLUSH_BATCH_SIZE = 5000
+REQUEST_FLUSH_BATCH_SIZE = 200
+FLUSH_LOCK_KEY = 'helpful-votes:flush'
+
+
+def record_helpful_vote(review, user):
+    """
+    Record ``user``'s vote on ``review``. Returns ``(created, helpful_votes)``,
+    the count including votes not flushed yet.
+    """
+    try:
+        with transaction.atomic():
+            HelpfulVote.objects.create(review=review, user=user)
+        created = True
+    except IntegrityError:
+        created = False
+    if cache.add(FLUSH_LOCK_KEY, 1, FLUSH_INTERVAL):
+        flush_helpful_votes(batch_size=REQUEST_FLUSH_BATCH_SIZE, max_batches=1)
+    # One statement, so a concurrent flush moving votes from pending to stored is seen whole or not at all
+    stored, pending = Review.objects.filter(pk=review.pk).annotate(
+        pending=Count('votes', filter=Q(votes__counted=False))
+    ).values_list('helpful_votes', 'pending').first() or (0, 0)
+    return created, stored + pending
+
+
+def flush_helpful_votes(batch_size=FLUSH_BATCH_SIZE, max_batches=None):
+    """
+    Fold uncounted votes into Review.helpful_votes, ``batch_size`` at a time,
+    until none are left or ``max_batches`` batches are done. Returns the
+    number of votes counted.
+    """
+    counted = batches = 0
+    while max_batches is None or batches < max_batches:
+        batches += 1
+        with transaction.atomic():
+            # Concurrent flushers skip each other's locked votes instead of counting them twice
+            votes = list(
+                HelpfulVote.objects.select_for_update(skip_locked=True)
+                .filter(counted=False).order_by('id').values_list('id', 'review_id')[:batch_size]
+            )
+            if not votes:
+                break
+            now = timezone.now()
+            reviews_by_increment = defaultdict(list)
+            for review_id, increment in Counter(review_id for _, review_id in votes).items():
+                reviews_by_increment[increment].append(review_id)
+            for increment, review_ids in reviews_by_increment.items():
+                Review.objects.filter(pk__in=review_ids).update(
+                    helpful_votes=F('helpful_votes') + increment, updated_at=now
+                )
+            HelpfulVote.objects.filter(pk__in=[pk for pk, _ in votes]).update(counted=True)
+        counted += len(votes)
+        if len(votes) < batch_size:
+            break
+    return counted
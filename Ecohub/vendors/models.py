@@ -42,6 +42,13 @@ class Vendor(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'verification_status', '-created_at'], name='vendor_active_status_new'),
+            models.Index(fields=['is_active', 'is_featured'], name='vendor_active_featured'),
+            models.Index(fields=['is_active', '-rating'], name='vendor_active_rating'),
+        ]
+
     def __str__(self):
         return self.company_name
 
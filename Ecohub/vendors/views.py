@@ -3,6 +3,8 @@ from rest_framework import viewsets, permissions, status, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Vendor
+from api.conditional import ConditionalGetMixin
+from api.pagination import PageOrKeysetPagination
 from .serializers import (
     VendorSerializer,
     VendorListSerializer,
@@ -20,12 +22,14 @@ class IsVendorOwner(permissions.BasePermission):
         return obj.user == request.user
 
 
-class VendorViewSet(viewsets.ModelViewSet):
+class VendorViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for vendor CRUD operations.
     """
     queryset = Vendor.objects.filter(is_active=True)
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsVendorOwner]
+    pagination_class = PageOrKeysetPagination
+    conditional_fields = ('updated_at', 'user__updated_at')
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -74,9 +78,9 @@ class VendorViewSet(viewsets.ModelViewSet):
     def products(self, request, pk=None):
         """Get all products for a specific vendor."""
         vendor = self.get_object()
-        products = vendor.products.all()
         # Import here to avoid circular dependency
         from products.serializers import ProductSerializer
+        products = ProductSerializer.prune_queryset(vendor.products.for_listing(), request)
         serializer = ProductSerializer(products, many=True, context={'request': request})
         return Response(serializer.data)
 